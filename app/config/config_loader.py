@@ -2,15 +2,60 @@
 Configuration loader that reads from YAML file and environment variables.
 Environment variables take precedence over YAML values.
 """
+import functools
 import os
-import yaml
+import threading
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional, Tuple
+
+# Directory of this module, resolved once
+_HERE = Path(__file__).resolve().parent
+
+# Strings treated as True for boolean settings
+_TRUTHY = frozenset(('true', '1', 'yes', 'on'))
+
+# Maps '.' -> '_' when deriving env var names from key paths
+_ENV_VAR_TRANS = str.maketrans('.', '_')
+
+# Sentinel for "key not found" in the get() cache (None is a valid config value)
+_MISSING = object()
+
+
+def _parse_yaml(data: bytes) -> Any:
+    """Parse YAML, importing PyYAML on first use (processes that never load a file skip it)."""
+    import yaml
+    # Prefer libyaml's C loader; fall back to the pure-Python loader if unavailable
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml.load(data, Loader=loader)
+
+
+@functools.cache
+def _find_default_config_file() -> Path:
+    """Find config.yaml in common locations (probed once per process)."""
+    # Try in order: /app/config.yaml (container), project root, app directory
+    possible_paths = [
+        Path('/app/config.yaml'),  # Docker config mount
+        _HERE.parent.parent / 'config.yaml',  # Project root
+        _HERE / 'config.yaml',  # App directory
+    ]
+    
+    for path in possible_paths:
+        if path.exists():
+            return path
+    
+    # Return default path even if it doesn't exist (will use defaults)
+    return possible_paths[1]
 
 
 class ConfigLoader:
     """Load configuration from YAML file with environment variable overrides."""
     
+    # Parsed YAML documents keyed by config path: {path: (mtime, config_dict)}
+    _document_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+    # Split key paths and derived env var names: {key_path: (keys, env_var_candidates)}
+    _split_cache: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+    
     def __init__(self, config_path: Optional[Path] = None):
         """
         Initialize config loader.
@@ -20,50 +65,102 @@ class ConfigLoader:
         """
         self.config_path = (Path(config_path) if isinstance(config_path, str) else config_path) or self._find_config_file()
         self.config: Dict[str, Any] = {}
+        # Leaf values keyed by full dotted path (e.g. 'django.debug'), built on load
+        self._flat: Dict[str, Any] = {}
+        self._config_mtime: Optional[float] = None
+        # Resolved get() values keyed by (key_path, type(default).__name__, env_var)
+        self._get_cache: Dict[Tuple[str, str, Optional[str]], Any] = {}
+        # Snapshot of os.environ; plain dict lookups skip os.environ's key encoding
+        self._env: Dict[str, str] = dict(os.environ)
         self._load_config()
     
     def _find_config_file(self) -> Path:
         """Find config.yaml in common locations."""
-        # Try in order: /app/config.yaml (container), project root, app directory
-        possible_paths = [
-            Path('/app/config.yaml'),  # Docker config mount
-            Path(__file__).resolve().parent.parent.parent / 'config.yaml',  # Project root
-            Path(__file__).resolve().parent / 'config.yaml',  # App directory
-        ]
-        
-        for path in possible_paths:
-            if path.exists():
-                return path
-        
-        # Return default path even if it doesn't exist (will use defaults)
-        return possible_paths[1]
+        return _find_default_config_file()
     
     def _load_config(self) -> None:
-        """Load YAML configuration file."""
-        if self.config_path.exists():
-            try:
-                with open(self.config_path, 'r') as f:
-                    self.config = yaml.safe_load(f) or {}
-            except Exception as e:
-                print(f"Warning: Could not load config from {self.config_path}: {e}")
-                self.config = {}
-        else:
+        """Load YAML configuration file (re-parsed only when its mtime changes)."""
+        try:
+            mtime = self.config_path.stat().st_mtime
+        except OSError:
             print(f"Warning: Config file not found at {self.config_path}, using defaults")
-            self.config = {}
+            self._set_config({}, None)
+            return
+        
+        cache_key = str(self.config_path)
+        cached = self._document_cache.get(cache_key)
+        if cached is not None and cached[0] == mtime:
+            self._set_config(cached[1], mtime)
+            return
+        
+        try:
+            config = _parse_yaml(self.config_path.read_bytes()) or {}
+        except Exception as e:
+            print(f"Warning: Could not load config from {self.config_path}: {e}")
+            self._set_config({}, None)
+            return
+        self._document_cache[cache_key] = (mtime, config)
+        self._set_config(config, mtime)
+    
+    def _set_config(self, config: Dict[str, Any], mtime: Optional[float]) -> None:
+        """Install a parsed config; drop memoized get() results if it changed."""
+        if mtime is None or mtime != self._config_mtime:
+            self._get_cache.clear()
+        if config is not self.config:
+            self._flat = self._flatten(config)
+        self.config = config
+        self._config_mtime = mtime
     
-    def _get_env_var_candidates(self, key_path: str) -> List[str]:
+    @classmethod
+    def _flatten(cls, config: Any, prefix: str = '') -> Dict[str, Any]:
+        """Flatten nested dicts into {'a.b.c': leaf_value}; only string keys are addressable."""
+        flat: Dict[str, Any] = {}
+        if not isinstance(config, dict):
+            return flat
+        for key, value in config.items():
+            if not isinstance(key, str):
+                continue
+            path = f"{prefix}{key}"
+            if isinstance(value, dict) and value:
+                flat.update(cls._flatten(value, f"{path}."))
+            else:
+                flat[path] = value
+        return flat
+    
+    def reload(self) -> None:
+        """Re-read the config file if it changed on disk and invalidate cached lookups."""
+        self._load_config()
+    
+    def refresh_env(self) -> None:
+        """Re-snapshot os.environ (e.g. after setting env vars at runtime)."""
+        self._env = dict(os.environ)
+        self._get_cache.clear()
+    
+    def _get_env_var_candidates(self, key_path: str) -> Tuple[str, ...]:
         """
         Get possible environment variable names for a YAML key path.
-        Returns list in order of preference (most preferred first).
+        Returns tuple in order of preference (most preferred first).
         
         Examples:
-            'django.secret_key' -> ['django.secret_key', 'DJANGO_SECRET_KEY']
-            'database.name' -> ['database.name', 'DATABASE_NAME']
+            'django.secret_key' -> ('django.secret_key', 'DJANGO_SECRET_KEY')
+            'database.name' -> ('database.name', 'DATABASE_NAME')
         """
-        return [
-            key_path,  # Dot-separated lowercase (matches YAML exactly)
-            key_path.upper().replace('.', '_'),  # Uppercase underscore (traditional)
-        ]
+        return self._split_key_path(key_path)[1]
+    
+    @classmethod
+    def _split_key_path(cls, key_path: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """Return (nested keys, env var candidates) for key_path, computed once per path."""
+        try:
+            return cls._split_cache[key_path]
+        except KeyError:
+            parts = cls._split_cache[key_path] = (
+                tuple(key_path.split('.')),
+                (
+                    key_path,  # Dot-separated lowercase (matches YAML exactly)
+                    key_path.upper().translate(_ENV_VAR_TRANS),  # Uppercase underscore (traditional)
+                ),
+            )
+            return parts
     
     def get(self, key_path: str, default: Any = None, env_var: Optional[str] = None) -> Any:
         """
@@ -78,37 +175,66 @@ class ConfigLoader:
         Returns:
             Configuration value, with env var taking precedence
         """
-        # Auto-derive env var candidates from key_path if not provided
-        if env_var is None:
-            env_var_candidates = self._get_env_var_candidates(key_path)
-        else:
-            env_var_candidates = [env_var]
+        cache_key = (key_path, type(default).__name__, env_var)
+        try:
+            value = self._get_cache[cache_key]
+        except KeyError:
+            value = self._get_cache[cache_key] = self._lookup(key_path, default, env_var)
+        return default if value is _MISSING else value
+    
+    def _env_lookup(self, key_path: str, env_var: Optional[str], kind: Optional[str]) -> Any:
+        """
+        Return the env var value for key_path converted to kind, or _MISSING if unset.
+        
+        kind is 'bool', 'int', 'list' or None (raw string).
+        """
+        # Use the explicit env var name if provided instead of the auto-derived ones
+        env_var_candidates = (env_var,) if env_var is not None else self._split_key_path(key_path)[1]
         
         # Check environment variables in order of preference
         for env_var_name in env_var_candidates:
-            env_value = os.getenv(env_var_name)
+            env_value = self._env.get(env_var_name)
             if env_value is not None:
                 # Try to convert to appropriate type
-                if isinstance(default, bool):
-                    return env_value.lower() in ('true', '1', 'yes', 'on')
-                elif isinstance(default, int):
+                if kind == 'bool':
+                    return env_value.lower() in _TRUTHY
+                elif kind == 'int':
                     try:
                         return int(env_value)
                     except ValueError:
                         return env_value
-                elif isinstance(default, list):
+                elif kind == 'list':
                     return [item.strip() for item in env_value.split(',')]
                 return env_value
+        return _MISSING
+    
+    def _lookup(self, key_path: str, default: Any, env_var: Optional[str]) -> Any:
+        """Resolve key_path from env vars, then YAML. Returns _MISSING if not found."""
+        if isinstance(default, bool):
+            kind = 'bool'
+        elif isinstance(default, int):
+            kind = 'int'
+        elif isinstance(default, list):
+            kind = 'list'
+        else:
+            kind = None
+        value = self._env_lookup(key_path, env_var, kind)
+        if value is not _MISSING:
+            return value
         
-        # Navigate through nested dict
-        keys = key_path.split('.')
-        value = self.config
+        # Leaf values are a single lookup in the flattened table
+        value = self._flat.get(key_path, _MISSING)
+        if value is not _MISSING:
+            return value
         
-        for key in keys:
-            if isinstance(value, dict) and key in value:
+        # Navigate through nested dict for subtrees (TypeError covers indexing into a non-dict leaf)
+        value = self.config
+        keys = self._split_key_path(key_path)[0]
+        try:
+            for key in keys:
                 value = value[key]
-            else:
-                return default
+        except (KeyError, TypeError):
+            return _MISSING
         
         return value
     
@@ -138,10 +264,11 @@ class ConfigLoader:
             env_var: Optional environment variable name. If None, auto-derived from key_path.
         """
         value = self.get(key_path, default, env_var)
-        if isinstance(value, bool):
+        # Env values are already converted by get(); only YAML strings need parsing
+        if value is True or value is False:
             return value
         if isinstance(value, str):
-            return value.lower() in ('true', '1', 'yes', 'on')
+            return value.lower() in _TRUTHY
         return bool(value)
     
     def get_int(self, key_path: str, default: int = 0, env_var: Optional[str] = None) -> int:
@@ -154,19 +281,101 @@ class ConfigLoader:
             env_var: Optional environment variable name. If None, auto-derived from key_path.
         """
         value = self.get(key_path, default, env_var)
+        # Env values are already converted by get(); only YAML strings need parsing
+        if type(value) is int:
+            return value
         try:
             return int(value)
         except (ValueError, TypeError):
             return default
 
 
+def _setting(key_path: str, default: Any) -> Any:
+    """Declare an AppSettings field resolved from key_path (typed by its default)."""
+    return field(metadata={'key_path': key_path, 'default': default})
+
+
+@dataclass(frozen=True, slots=True)
+class AppSettings:
+    """
+    Core settings resolved once from a ConfigLoader.
+    
+    Each field is looked up by its key_path using the typed getter matching
+    the type of its default (get_bool / get_int / get_list / get).
+    """
+    django_secret_key: str = _setting(
+        'django.secret_key', 'django-insecure-z&x2fgjdjshurb8*p9jtwlov@hy!_h&+obyi1(kl7u^#u5#dr$'
+    )
+    django_debug: bool = _setting('django.debug', False)
+    django_allowed_hosts: list = _setting('django.allowed_hosts', ['localhost', '127.0.0.1', '0.0.0.0'])
+    django_site_id: int = _setting('django.site_id', 1)
+    django_language_code: str = _setting('django.language_code', 'en-us')
+    django_timezone: str = _setting('django.timezone', 'UTC')
+    database_name: str = _setting('database.name', 'gallery')
+    database_user: str = _setting('database.user', 'postgres')
+    database_password: str = _setting('database.password', 'postgres')
+    database_host: str = _setting('database.host', 'db')
+    database_port: Any = _setting('database.port', '5432')
+    storage_use_s3: bool = _setting('storage.use_s3', False)
+    celery_broker_url: str = _setting('celery.broker_url', 'redis://redis:6379/0')
+    celery_result_backend: str = _setting('celery.result_backend', 'redis://redis:6379/0')
+    celery_task_time_limit: int = _setting('celery.task_time_limit', 1800)
+    celery_task_soft_time_limit: int = _setting('celery.task_soft_time_limit', 1500)
+    celery_worker_prefetch_multiplier: int = _setting('celery.worker_prefetch_multiplier', 1)
+    celery_worker_max_tasks_per_child: int = _setting('celery.worker_max_tasks_per_child', 1000)
+    celery_visibility_timeout: int = _setting('celery.visibility_timeout', 7200)
+    celery_worker_proc_alive_timeout: int = _setting('celery.worker_proc_alive_timeout', 600)
+    gallery_media_base_url: str = _setting('gallery.media_base_url', '/media')
+    gallery_signed_url_secret: Optional[str] = _setting('gallery.signed_url_secret', None)
+    gallery_signed_url_expires_in: int = _setting('gallery.signed_url_expires_in', 3600)
+    ai_tensorrt: bool = _setting('ai.tensorrt', False)
+    ai_model_cache_dir: str = _setting('ai.model_cache_dir', '/models/cache')
+    
+    @classmethod
+    def from_loader(cls, loader: 'ConfigLoader') -> 'AppSettings':
+        """Resolve every field from loader in a single pass."""
+        values = {}
+        for f in fields(cls):
+            key_path, default = f.metadata['key_path'], f.metadata['default']
+            if isinstance(default, bool):
+                values[f.name] = loader.get_bool(key_path, default)
+            elif isinstance(default, int):
+                values[f.name] = loader.get_int(key_path, default)
+            elif isinstance(default, list):
+                values[f.name] = loader.get_list(key_path, list(default))
+            else:
+                values[f.name] = loader.get(key_path, default)
+        return cls(**values)
+
+
 # Global config loader instance
 _config_loader: Optional[ConfigLoader] = None
+_config_loader_lock = threading.Lock()
 
 
 def get_config_loader(path: Optional[Path|str] = None) -> ConfigLoader:
-    """Get or create the global config loader instance."""
+    """Get or create the global config loader instance (thread-safe, created once)."""
     global _config_loader
-    if _config_loader is None:
-        _config_loader = ConfigLoader(path)
-    return _config_loader
+    loader = _config_loader
+    if loader is None:
+        with _config_loader_lock:
+            if _config_loader is None:
+                _config_loader = ConfigLoader(path)
+            loader = _config_loader
+    return loader
+
+
+_app_settings: Optional[AppSettings] = None
+
+
+def get_app_settings(path: Optional[Path|str] = None) -> AppSettings:
+    """Get the AppSettings resolved from the global config loader (built once)."""
+    global _app_settings
+    app_settings = _app_settings
+    if app_settings is None:
+        loader = get_config_loader(path)
+        with _config_loader_lock:
+            if _app_settings is None:
+                _app_settings = AppSettings.from_loader(loader)
+            app_settings = _app_settings
+    return app_settings
@@ -16,6 +16,7 @@ import logging
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 # BASE_DIR points to /app (where manage.py is located)
@@ -29,8 +30,10 @@ load_dotenv(BASE_DIR.parent / '.env')  # Project root
 load_dotenv(BASE_DIR / '.env', override=False)  # App directory (fallback)
 
 # Load YAML configuration
-from .config_loader import get_config_loader
+from .config_loader import get_config_loader, get_app_settings
 config = get_config_loader(os.getenv('CONFIG_PATH', None))
+# Core settings resolved once in a single pass (see AppSettings for keys and defaults)
+app_settings = get_app_settings()
 
 
 # Quick-start development settings - unsuitable for production
@@ -38,14 +41,14 @@ config = get_config_loader(os.getenv('CONFIG_PATH', None))
 
 # SECURITY WARNING: keep the secret key used in production secret!
 # Uses DJANGO_SECRET_KEY env var or config.yaml django.secret_key
-SECRET_KEY = config.get('django.secret_key', 'django-insecure-z&x2fgjdjshurb8*p9jtwlov@hy!_h&+obyi1(kl7u^#u5#dr$')
+SECRET_KEY = app_settings.django_secret_key
 
 # SECURITY WARNING: don't run with debug turned on in production!
 # Uses DJANGO_DEBUG env var or config.yaml django.debug
-DEBUG = config.get_bool('django.debug', False)
+DEBUG = app_settings.django_debug
 
 # Uses DJANGO_ALLOWED_HOSTS env var or config.yaml django.allowed_hosts
-ALLOWED_HOSTS = config.get_list('django.allowed_hosts', ['localhost', '127.0.0.1', "0.0.0.0"])
+ALLOWED_HOSTS = app_settings.django_allowed_hosts
 
 
 # Application definition
@@ -77,7 +80,7 @@ INSTALLED_APPS = [
 
 # Add storages if using S3/SeaweedFS
 # Uses STORAGE_USE_S3 env var or config.yaml storage.use_s3
-USE_S3 = config.get_bool('storage.use_s3', False)
+USE_S3 = app_settings.storage_use_s3
 if USE_S3:
     INSTALLED_APPS.append('storages')
 
@@ -120,11 +123,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
         # Uses DATABASE_NAME, DATABASE_USER, etc. env vars or config.yaml
-        'NAME': config.get('database.name', 'gallery'),
-        'USER': config.get('database.user', 'postgres'),
-        'PASSWORD': config.get('database.password', 'postgres'),
-        'HOST': config.get('database.host', 'db'),
-        'PORT': config.get('database.port', '5432'),
+        'NAME': app_settings.database_name,
+        'USER': app_settings.database_user,
+        'PASSWORD': app_settings.database_password,
+        'HOST': app_settings.database_host,
+        'PORT': app_settings.database_port,
     }
 }
 
@@ -151,8 +154,8 @@ AUTH_PASSWORD_VALIDATORS = [
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
-LANGUAGE_CODE = config.get('django.language_code', 'en-us')
-TIME_ZONE = config.get('django.timezone', 'UTC')
+LANGUAGE_CODE = app_settings.django_language_code
+TIME_ZONE = app_settings.django_timezone
 
 USE_I18N = True
 
@@ -215,7 +218,9 @@ if USE_S3:
     AWS_S3_ENDPOINT_URL = config.get('storage.s3.endpoint_url', 'http://seaweedfs:8333')
     AWS_S3_REGION_NAME = config.get('storage.s3.region_name', 'us-east-1')
     AWS_S3_USE_SSL = config.get_bool('storage.s3.use_ssl', False)
-    AWS_S3_FILE_OVERWRITE = False
+    # Upload keys are uuid4-named (gallery.utils.upload_picture_file), so they never collide: skip the
+    # exists() HEAD request S3Boto3Storage.get_available_name would otherwise issue on every save
+    AWS_S3_FILE_OVERWRITE = True
     AWS_DEFAULT_ACL = None
     
     # Use S3 for media files
@@ -254,7 +259,7 @@ AUTHENTICATION_BACKENDS = [
 
 # Site ID (required for allauth)
 # Uses DJANGO_SITE_ID env var or config.yaml django.site_id
-SITE_ID = config.get_int('django.site_id', 1)
+SITE_ID = app_settings.django_site_id
 
 # allauth Configuration
 # ACCOUNT_AUTHENTICATION_METHOD = 'email'  # Use email instead of username # Also deprecated
@@ -334,23 +339,30 @@ if config.get_bool('social_auth.github.enabled', False):
 
 # Celery Configuration
 # Uses CELERY_BROKER_URL, CELERY_RESULT_BACKEND, etc. env vars or config.yaml
-CELERY_BROKER_URL = config.get('celery.broker_url', 'redis://redis:6379/0')
-CELERY_RESULT_BACKEND = config.get('celery.result_backend', 'redis://redis:6379/0')
+CELERY_BROKER_URL = app_settings.celery_broker_url
+CELERY_RESULT_BACKEND = app_settings.celery_result_backend
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
-CELERY_TASK_TIME_LIMIT = config.get_int('celery.task_time_limit', 1800)  # seconds
-CELERY_TASK_SOFT_TIME_LIMIT = config.get_int('celery.task_soft_time_limit', 1500)  # seconds
-CELERY_WORKER_PREFETCH_MULTIPLIER = config.get_int('celery.worker_prefetch_multiplier', 1)
-CELERY_WORKER_MAX_TASKS_PER_CHILD = config.get_int('celery.worker_max_tasks_per_child', 1000)
+CELERY_TASK_TIME_LIMIT = app_settings.celery_task_time_limit  # seconds
+CELERY_TASK_SOFT_TIME_LIMIT = app_settings.celery_task_soft_time_limit  # seconds
+CELERY_WORKER_PREFETCH_MULTIPLIER = app_settings.celery_worker_prefetch_multiplier
+CELERY_WORKER_MAX_TASKS_PER_CHILD = app_settings.celery_worker_max_tasks_per_child
+# acks_late tasks stay unacked in Redis until they finish; keep the redelivery
+# window well above CELERY_TASK_TIME_LIMIT so long GPU jobs are not run twice
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': app_settings.celery_visibility_timeout}
+# GPU worker children load YOLO and PaddleOCR in worker_process_init, before they report up to the
+# parent; Celery's 4s default would kill them mid-load (a cold start also downloads the OCR models)
+CELERY_WORKER_PROC_ALIVE_TIMEOUT = app_settings.celery_worker_proc_alive_timeout  # seconds
 
 # Celery Queue Configuration
 # Separate queues for CPU and GPU tasks
 CELERY_TASK_ROUTES = {
     # Route GPU-intensive tasks (YOLO, PaddleOCR) to GPU queue
     'gallery.tasks.process_picture_ai': {'queue': 'gpu'},
+    'gallery.tasks.process_picture_ai_batch': {'queue': 'gpu'},
     # Route CPU tasks to CPU queue
     # Example: 'gallery.tasks.process_metadata': {'queue': 'cpu'},
 }
@@ -358,10 +370,22 @@ CELERY_TASK_DEFAULT_QUEUE = 'cpu'  # Default queue for tasks without explicit ro
 CELERY_TASK_DEFAULT_EXCHANGE = 'tasks'
 CELERY_TASK_DEFAULT_ROUTING_KEY = 'cpu'
 
+# Periodic tasks (run by the celery-beat service)
+CELERY_BEAT_SCHEDULE = {
+    'recount-tag-usage': {
+        'task': 'gallery.tasks.recount_tag_usage',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
+
 # Gallery App Configuration
-GALLERY_MEDIA_BASE_URL = config.get('gallery.media_base_url', '/media')
-GALLERY_SIGNED_URL_SECRET = config.get('gallery.signed_url_secret', None)  # Optional, falls back to SECRET_KEY
-GALLERY_SIGNED_URL_EXPIRES_IN = config.get_int('gallery.signed_url_expires_in', 3600)  # 1 hour default
+GALLERY_MEDIA_BASE_URL = app_settings.gallery_media_base_url
+GALLERY_SIGNED_URL_SECRET = app_settings.gallery_signed_url_secret  # Optional, falls back to SECRET_KEY
+GALLERY_SIGNED_URL_EXPIRES_IN = app_settings.gallery_signed_url_expires_in  # 1 hour default
+
+# GPU worker inference: opt-in TensorRT FP16 engines, built once per GPU architecture under the cache dir
+GALLERY_AI_TENSORRT = app_settings.ai_tensorrt
+GALLERY_AI_MODEL_CACHE_DIR = app_settings.ai_model_cache_dir
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
@@ -19,6 +19,8 @@ DATABASES = {
 
 # Disable migrations during tests (faster)
 class DisableMigrations:
+    __slots__ = ()
+
     def __contains__(self, item):
         return True
 
@@ -9,6 +9,12 @@ class TagAdmin(admin.ModelAdmin):
     search_fields = ['name', 'slug']
     readonly_fields = ['slug', 'usage_count', 'created_at']
     ordering = ['name']
+    actions = ['recount_usage']
+
+    @admin.action(description='Recount usage from tag links')
+    def recount_usage(self, request, queryset):
+        updated = Tag.recount_usage(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f'Recounted usage for {updated} tag(s).')
 
 
 @admin.register(Gallery)
@@ -17,6 +23,8 @@ class GalleryAdmin(admin.ModelAdmin):
     list_filter = ['gallery_type', 'is_favorite', 'tags', 'created_at', 'deleted_at']
     search_fields = ['name', 'description', 'owner__username', 'owner__email', 'tags__name']
     readonly_fields = ['created_at', 'updated_at']
+    list_select_related = ['owner']
+    list_per_page = 50
     # filter_horizontal = ['shared_with', 'tags']
 
 
@@ -27,6 +35,8 @@ class AlbumAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description', 'gallery__name', 'tags__name']
     readonly_fields = ['created_at', 'updated_at']
     filter_horizontal = ['tags']
+    list_select_related = ['gallery']
+    list_per_page = 50
 
 
 class PictureTagInline(admin.TabularInline):
@@ -42,6 +52,8 @@ class PictureAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description', 'album__name', 'ocr_text', 'tags__name']
     readonly_fields = ['uploaded_at', 'updated_at', 'seaweedfs_file_id']
     inlines = [PictureTagInline]
+    list_select_related = ['album', 'album__gallery']
+    list_per_page = 50
 
 
 @admin.register(GalleryShare)
@@ -49,3 +61,5 @@ class GalleryShareAdmin(admin.ModelAdmin):
     list_display = ['gallery', 'user', 'can_edit', 'shared_at']
     list_filter = ['can_edit', 'shared_at']
     search_fields = ['gallery__name', 'user__username', 'user__email']
+    list_select_related = ['gallery', 'gallery__owner', 'user']
+    list_per_page = 50
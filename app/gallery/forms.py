@@ -1,9 +1,21 @@
 """
 Django forms for Gallery app
 """
+import re
+
 from django import forms
 from .models import Gallery, Album, Picture
 
+# Comma separator with any surrounding whitespace
+_TAG_SPLIT = re.compile(r'\s*,\s*')
+
+
+def parse_tag_names(tags_str):
+    """Split a comma-separated tag string into non-empty, stripped tag names."""
+    if not tags_str:
+        return []
+    return [t for t in _TAG_SPLIT.split(tags_str.strip()) if t]
+
 
 class GalleryForm(forms.ModelForm):
     """Form for creating/editing Gallery"""
@@ -26,7 +38,7 @@ class GalleryForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if self.instance and self.instance.pk:
             # Pre-populate tags for editing
-            self.fields['tags'].initial = ', '.join([tag.name for tag in self.instance.tags.all()])
+            self.fields['tags'].initial = self.instance.tag_names_joined
     
     def save(self, commit=True):
         gallery = super().save(commit=commit)
@@ -65,7 +77,7 @@ class AlbumForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if self.instance and self.instance.pk:
             # Pre-populate tags for editing
-            self.fields['tags'].initial = ', '.join([tag.name for tag in self.instance.tags.all()])
+            self.fields['tags'].initial = self.instance.tag_names_joined
     
     def save(self, commit=True):
         album = super().save(commit=False)
@@ -77,11 +89,12 @@ class AlbumForm(forms.ModelForm):
         # Handle tags
         tags_str = self.cleaned_data.get('tags', '')
         if tags_str:
-            tag_names = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
+            tag_names = parse_tag_names(tags_str)
             album.set_tags(tag_names)
         elif commit:
             # Clear tags if empty
             album.tags.clear()
+            album.__dict__.pop('tag_names_joined', None)
         
         return album
 
@@ -105,13 +118,13 @@ class PictureEditForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self.instance and self.instance.pk:
-            self.fields['tags'].initial = ', '.join([tag.name for tag in self.instance.user_tags])
+            self.fields['tags'].initial = self.instance.tag_names_joined
 
     def save(self, commit=True):
         picture = super().save(commit=commit)
         if commit:
             tags_str = self.cleaned_data.get('tags', '')
-            tag_names = [t.strip() for t in tags_str.split(',') if t.strip()]
+            tag_names = parse_tag_names(tags_str)
             picture.set_tags(tag_names)
         return picture
 
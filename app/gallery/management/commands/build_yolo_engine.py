@@ -0,0 +1,24 @@
+"""
+Build the YOLO TensorRT FP16 engine used by the GPU worker.
+
+Run once per GPU architecture on the GPU host, before starting the worker:
+    python manage.py build_yolo_engine
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from gallery.tasks import export_yolo_engine
+
+
+class Command(BaseCommand):
+    help = "Export the YOLO TensorRT FP16 engine for this GPU into GALLERY_AI_MODEL_CACHE_DIR"
+
+    def handle(self, *args, **options):
+        try:
+            engine = export_yolo_engine()
+        except ImportError as e:
+            raise CommandError(f"ultralytics is not installed: {e}")
+        if engine is None:
+            raise CommandError(
+                "TensorRT is disabled (ai.tensorrt) or this GPU has no FP16 TensorRT support (sm_75+)"
+            )
+        self.stdout.write(self.style.SUCCESS(f"YOLO TensorRT engine: {engine}"))
@@ -1,36 +1,72 @@
 # Data migration: copy existing Picture.tags (user) and Picture.ai_tags (ai) into PictureTag
 
+from functools import lru_cache
+
 from django.db import migrations
 from django.utils.text import slugify
 
+BATCH_SIZE = 1000
+
+# AI tag names repeat across pictures; avoid re-running slugify's Unicode normalization
+_cached_slugify = lru_cache(maxsize=8192)(slugify)
+
+
+def _flush_links(PictureTag, links):
+    """Insert buffered PictureTag rows (existing rows are skipped) and clear the buffer."""
+    if links:
+        PictureTag.objects.bulk_create(links, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        links.clear()
+
+
+def _flush_ai_links(Tag, PictureTag, slug_to_tag_id, pending, new_tags):
+    """Create missing AI tags in bulk, then insert PictureTag rows for pending (picture_id, slug) pairs."""
+    if new_tags:
+        Tag.objects.bulk_create(
+            [Tag(slug=slug, name=name) for slug, name in new_tags.items()],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        slug_to_tag_id.update(Tag.objects.filter(slug__in=list(new_tags)).values_list('slug', 'id'))
+        new_tags.clear()
+    links = [
+        PictureTag(picture_id=picture_id, tag_id=slug_to_tag_id[slug], source='ai')
+        for picture_id, slug in pending
+        if slug in slug_to_tag_id
+    ]
+    pending.clear()
+    _flush_links(PictureTag, links)
+
 
 def forwards(apps, schema_editor):
     Picture = apps.get_model('gallery', 'Picture')
     PictureTag = apps.get_model('gallery', 'PictureTag')
     Tag = apps.get_model('gallery', 'Tag')
-    for picture in Picture.objects.all():
-        for tag in picture.tags.all():
-            PictureTag.objects.get_or_create(
-                picture=picture,
-                tag=tag,
-                source='user',
-                defaults={},
-            )
-        for name in (picture.ai_tags or []):
+
+    # User tags: stream the old M2M join table directly (no Picture/Tag hydration)
+    links = []
+    user_links = Picture.tags.through.objects.values_list('picture_id', 'tag_id')
+    for picture_id, tag_id in user_links.iterator(chunk_size=BATCH_SIZE):
+        links.append(PictureTag(picture_id=picture_id, tag_id=tag_id, source='user'))
+        if len(links) >= BATCH_SIZE:
+            _flush_links(PictureTag, links)
+    _flush_links(PictureTag, links)
+
+    # AI tags: resolve names against one up-front slug -> id map, creating missing tags per batch
+    slug_to_tag_id = dict(Tag.objects.values_list('slug', 'id'))
+    pending = []  # (picture_id, slug)
+    new_tags = {}  # slug -> normalized name
+    for picture_id, ai_tags in Picture.objects.values_list('id', 'ai_tags').iterator(chunk_size=BATCH_SIZE):
+        for name in (ai_tags or []):
             name_normalized = name.lower().strip() if name else ''
             if not name_normalized:
                 continue
-            slug = slugify(name_normalized)
-            tag, _ = Tag.objects.get_or_create(
-                slug=slug,
-                defaults={'name': name_normalized},
-            )
-            PictureTag.objects.get_or_create(
-                picture=picture,
-                tag=tag,
-                source='ai',
-                defaults={},
-            )
+            slug = _cached_slugify(name_normalized)
+            if slug not in slug_to_tag_id:
+                new_tags.setdefault(slug, name_normalized)
+            pending.append((picture_id, slug))
+        if len(pending) >= BATCH_SIZE:
+            _flush_ai_links(Tag, PictureTag, slug_to_tag_id, pending, new_tags)
+    _flush_ai_links(Tag, PictureTag, slug_to_tag_id, pending, new_tags)
 
 
 def backwards(apps, schema_editor):
@@ -0,0 +1,26 @@
+# Generated by Django 6.1.2 on 2026-10-14 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0005_rename_gallery_pictag_pic_src_idx_gallery_pic_picture_58a83a_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='picturetag',
+            name='source',
+            field=models.CharField(choices=[('user', 'User'), ('ai', 'AI'), ('exif', 'EXIF')], help_text='Whether this tag was added by user, AI (e.g. YOLO), or EXIF extraction', max_length=10, verbose_name='Source'),
+        ),
+        migrations.AddIndex(
+            model_name='picturetag',
+            index=models.Index(fields=['tag', 'source'], name='pt_tag_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='picturetag',
+            index=models.Index(fields=['source'], name='pt_source_idx'),
+        ),
+    ]
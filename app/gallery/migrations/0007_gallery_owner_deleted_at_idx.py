@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-14 18:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0006_picturetag_tag_source_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gallery',
+            index=models.Index(fields=['owner', 'deleted_at'], name='gallery_owner_del_idx'),
+        ),
+    ]
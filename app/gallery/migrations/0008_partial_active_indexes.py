@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-14 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0007_gallery_owner_deleted_at_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['gallery'], name='album_active_by_gallery'),
+        ),
+        migrations.AddIndex(
+            model_name='gallery',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['owner', 'gallery_type'], name='gallery_active_owner_type'),
+        ),
+        migrations.AddIndex(
+            model_name='picture',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['album', '-uploaded_at'], name='picture_active_by_album_recent'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.1.2 on 2026-10-14 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0008_partial_active_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='album',
+            name='gallery_alb_gallery_57def7_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='picture',
+            name='gallery_pic_album_i_e4e993_idx',
+        ),
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='album_trashed'),
+        ),
+        migrations.AddIndex(
+            model_name='picture',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='picture_trashed'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Trigram GIN indexes for the gallery_list search (PostgreSQL only; a no-op on other backends)
+
+from django.db import migrations
+
+# icontains compiles to UPPER(col) LIKE UPPER(%s) on PostgreSQL, so those columns are indexed on UPPER();
+# tag names are stored lowercased and searched with a plain LIKE (Tag.name_contains)
+TRIGRAM_INDEXES = [
+    ('gallery_name_trgm', 'gallery_gallery', 'UPPER("name")'),
+    ('gallery_description_trgm', 'gallery_gallery', 'UPPER("description")'),
+    ('tag_name_trgm', 'gallery_tag', '"name"'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, expression in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" USING gin ({expression} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0009_partial_trash_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
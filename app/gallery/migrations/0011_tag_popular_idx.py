@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-14 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0010_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(condition=models.Q(('usage_count__gt', 0)), fields=['-usage_count'], name='tag_popular_idx'),
+        ),
+    ]
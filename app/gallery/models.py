@@ -1,15 +1,73 @@
 """
 Gallery models: Gallery, Album, Picture, Tag
 """
-from django.db import models
+import json
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from functools import lru_cache
+
+from django.db import DEFAULT_DB_ALIAS, connection, models, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.core.validators import MinLengthValidator
 from django.utils import timezone
+from django.utils.functional import cached_property
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.text import slugify
 
 User = get_user_model()
 
 
+# Same substitutions django.utils.text.slugify applies after its Unicode normalization step
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_DASH_RE = re.compile(r'[-\s]+')
+
+
+def _fast_slugify(value):
+    """slugify() with the NFKD/ASCII round-trip skipped for ASCII input (a no-op there)"""
+    if not value.isascii():
+        return slugify(value)
+    return _SLUG_DASH_RE.sub('-', _SLUG_STRIP_RE.sub('', value.lower())).strip('-_')
+
+
+@lru_cache(maxsize=8192)
+def _normalize_tag(name):
+    """(normalized name, slug) for a raw tag name; memoized since names repeat heavily (e.g. YOLO classes)"""
+    name_normalized = name.lower().strip()
+    return name_normalized, _fast_slugify(name_normalized)
+
+
+# Process-local LRU of committed tags: slug -> (id, name). usage_count is deliberately not cached.
+_TAG_CACHE_SIZE = 4096
+_tag_cache = OrderedDict()
+_tag_cache_lock = threading.Lock()
+
+
+def _cache_tag(slug, tag_id, name):
+    with _tag_cache_lock:
+        _tag_cache[slug] = (tag_id, name)
+        _tag_cache.move_to_end(slug)
+        if len(_tag_cache) > _TAG_CACHE_SIZE:
+            _tag_cache.popitem(last=False)
+
+
+def _cached_tag(slug):
+    with _tag_cache_lock:
+        entry = _tag_cache.get(slug)
+        if entry is not None:
+            _tag_cache.move_to_end(slug)
+        return entry
+
+
+def _evict_tag(tag_id):
+    with _tag_cache_lock:
+        for slug in [slug for slug, (cached_id, _) in _tag_cache.items() if cached_id == tag_id]:
+            del _tag_cache[slug]
+
+
 class Tag(models.Model):
     """Shared Tag model for Gallery, Album, and Picture"""
     
@@ -44,39 +102,272 @@ class Tag(models.Model):
         indexes = [
             models.Index(fields=['name']),
             models.Index(fields=['slug']),
+            # Popular tags: top-N by usage_count without sorting the whole table
+            models.Index(
+                fields=['-usage_count'],
+                condition=models.Q(usage_count__gt=0),
+                name='tag_popular_idx',
+            ),
         ]
     
     def __str__(self):
         return self.name
     
     def save(self, *args, **kwargs):
-        """Auto-generate slug from name"""
-        if not self.slug:
-            self.slug = slugify(self.name)
+        """Auto-generate slug from name (only touches fields that are being written)"""
+        update_fields = kwargs.get('update_fields')
         # Normalize name to lowercase for consistency
-        self.name = self.name.lower().strip()
+        if update_fields is None or 'name' in update_fields:
+            self.name = _normalize_tag(self.name or '')[0]
+        if not self.slug and (update_fields is None or 'slug' in update_fields):
+            self.slug = _normalize_tag(self.name)[1]
         super().save(*args, **kwargs)
     
     @classmethod
     def get_or_create_tag(cls, name):
         """Get or create a tag by name (case-insensitive)"""
-        name_normalized = name.lower().strip()
-        slug = slugify(name_normalized)
-        tag, created = cls.objects.get_or_create(
-            slug=slug,
-            defaults={'name': name_normalized}
-        )
+        name_normalized, slug = _normalize_tag(name)
+        cached = _cached_tag(slug)
+        if cached is not None:
+            # Deferred instance: usage_count/created_at load lazily and save() only writes id/name/slug
+            tag_id, tag_name = cached
+            return cls.from_db(DEFAULT_DB_ALIAS, ['id', 'name', 'slug'], [tag_id, tag_name, slug]), False
+        try:
+            tag, created = cls.objects.get(slug=slug), False
+        except cls.DoesNotExist:
+            # INSERT ... ON CONFLICT DO NOTHING: no savepoint, and a concurrent insert is not an error
+            cls.objects.bulk_create([cls(slug=slug, name=name_normalized)], ignore_conflicts=True)
+            tag, created = cls.objects.get(slug=slug), True
+        # Only cache once committed, so a rolled-back insert never leaves a dangling id behind
+        transaction.on_commit(lambda: _cache_tag(tag.slug, tag.pk, tag.name))
         return tag, created
     
+    @classmethod
+    def link_tag(cls, tag_name, through, **link):
+        """
+        Get or create the tag for tag_name and its through(tag_id=..., **link) row; returns (tag, link created).
+        A cached tag id is confirmed in the same query that looks for the link: the tag may have been deleted
+        by another process (whose post_delete only evicts its own cache), and the deferred link FK would then
+        fail at commit. A dead id is evicted and the tag is resolved again from the database.
+        """
+        tag, _ = cls.get_or_create_tag(tag_name)
+        if tag.get_deferred_fields():
+            linked = cls.objects.filter(pk=tag.pk).annotate(
+                linked=models.Exists(through.objects.filter(tag_id=models.OuterRef('pk'), **link))
+            ).values_list('linked', flat=True).first()
+            if linked:
+                return tag, False
+            if linked is None:
+                _evict_tag(tag.pk)
+                tag, _ = cls.get_or_create_tag(tag_name)
+        _, created = through.objects.get_or_create(tag_id=tag.pk, **link)
+        return tag, created
+    
+    @staticmethod
+    def slugs_for(names):
+        """Slugs for raw tag names, normalized the same way tags are stored (deduplicated)"""
+        return list(dict.fromkeys(
+            slug for slug in (_normalize_tag(name)[1] for name in names if name) if slug
+        ))
+    
+    @classmethod
+    def ids_for(cls, names):
+        """Uncorrelated subquery of tag ids for raw names; lets searches probe link tables by tag_id"""
+        return cls.objects.filter(slug__in=cls.slugs_for(names)).values('id')
+    
+    @staticmethod
+    def _link_table(model):
+        """(through model, owner FK column) linking Gallery, Album or Picture rows to tags"""
+        if model is Picture:
+            return PictureTag, 'picture_id'
+        return model.tags.through, f'{model._meta.model_name}_id'
+    
+    @classmethod
+    def filter_tagged(cls, queryset, tag_names):
+        """
+        Restrict a Gallery/Album/Picture queryset to rows linked to any of tag_names.
+        EXISTS stops at the first matching link and needs no DISTINCT over join rows; tag ids are
+        resolved once, so each probe is an (owner_id, tag_id) index lookup on the link table.
+        """
+        through, fk = cls._link_table(queryset.model)
+        return queryset.filter(models.Exists(
+            through.objects.filter(**{fk: models.OuterRef('pk')}, tag_id__in=cls.ids_for(tag_names))
+        ))
+    
+    @classmethod
+    def name_contains(cls, model, text):
+        """
+        EXISTS condition for Gallery/Album/Picture rows linked to a tag whose name contains text.
+        Names are stored lowercased, so a case-sensitive LIKE on the lowered text is enough (and
+        can use the tag name trigram index on PostgreSQL); combine with other Q filters without DISTINCT.
+        """
+        through, fk = cls._link_table(model)
+        return models.Exists(
+            through.objects.filter(**{fk: models.OuterRef('pk')}, tag__name__contains=text.lower().strip())
+        )
+    
+    @classmethod
+    def get_or_create_tag_ids(cls, names):
+        """
+        Get or create tags for a list of names in bulk (case-insensitive).
+        Returns {normalized name: tag id} in first-seen order. Names without a slug are skipped.
+        """
+        # One memoized normalize per input; duplicates (common in AI output) collapse here
+        name_to_slug = {}
+        slug_to_name = {}
+        for name in names or []:
+            if not name:
+                continue
+            name_normalized, slug = _normalize_tag(name)
+            if slug:
+                name_to_slug.setdefault(name_normalized, slug)
+                slug_to_name.setdefault(slug, name_normalized)
+        if not slug_to_name:
+            return {}
+        slug_to_id = dict(cls.objects.filter(slug__in=list(slug_to_name)).values_list('slug', 'id'))
+        missing = [slug for slug in slug_to_name if slug not in slug_to_id]
+        if missing:
+            cls.objects.bulk_create(
+                [cls(slug=slug, name=slug_to_name[slug]) for slug in missing],
+                ignore_conflicts=True,
+            )
+            slug_to_id.update(cls.objects.filter(slug__in=missing).values_list('slug', 'id'))
+        return {name: slug_to_id[slug] for name, slug in name_to_slug.items() if slug in slug_to_id}
+    
+    @classmethod
+    def get_or_create_tags(cls, names):
+        """
+        Get or create tags for a list of names in bulk (case-insensitive).
+        Returns tag ids, deduplicated, in first-seen order. Names without a slug are skipped.
+        """
+        return list(dict.fromkeys(cls.get_or_create_tag_ids(names).values()))
+    
     def increment_usage(self):
-        """Increment usage count"""
-        Tag.objects.filter(pk=self.pk).update(usage_count=models.F('usage_count') + 1)
-        self.refresh_from_db()
+        """Increment usage count in one UPDATE (exact via RETURNING on PostgreSQL, optimistic elsewhere)"""
+        self._adjust_usage(1)
     
     def decrement_usage(self):
-        """Decrement usage count"""
-        Tag.objects.filter(pk=self.pk, usage_count__gt=0).update(usage_count=models.F('usage_count') - 1)
-        self.refresh_from_db()
+        """Decrement usage count in one UPDATE (exact via RETURNING on PostgreSQL, optimistic elsewhere)"""
+        self._adjust_usage(-1)
+    
+    def _adjust_usage(self, delta):
+        """Apply delta to usage_count without going below 0, reading the new value back when the backend can"""
+        if connection.vendor != 'postgresql':
+            queryset = Tag.objects.filter(pk=self.pk)
+            if delta < 0:
+                queryset = queryset.filter(usage_count__gte=-delta)
+            # Keep a loaded counter roughly in sync without a re-read (deferred instances stay deferred)
+            if queryset.update(usage_count=models.F('usage_count') + delta) and 'usage_count' in self.__dict__:
+                self.usage_count += delta
+            return
+        table = connection.ops.quote_name(Tag._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET usage_count = usage_count + %s '
+                f'WHERE id = %s AND usage_count + %s >= 0 RETURNING usage_count',
+                [delta, self.pk, delta],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            self.usage_count = row[0]
+    
+    @classmethod
+    def bulk_adjust_usage(cls, tag_ids, delta):
+        """Add delta to usage_count of all given tags in one UPDATE (never drops below 0)"""
+        if not tag_ids or not delta:
+            return
+        queryset = cls.objects.filter(id__in=tag_ids)
+        if delta < 0:
+            queryset = queryset.filter(usage_count__gte=-delta)
+        queryset.update(usage_count=models.F('usage_count') + delta)
+    
+    @classmethod
+    def bulk_adjust_usage_counts(cls, counts):
+        """Add {tag_id: delta} to usage_count with one UPDATE per distinct delta"""
+        tag_ids_by_delta = defaultdict(list)
+        for tag_id, delta in counts.items():
+            tag_ids_by_delta[delta].append(tag_id)
+        for delta, tag_ids in tag_ids_by_delta.items():
+            cls.bulk_adjust_usage(tag_ids, delta)
+    
+    @classmethod
+    @transaction.atomic
+    def bulk_apply(cls, objs, tag_names):
+        """
+        Add tags to many Gallery, Album or Picture objects (one model per call) in a fixed number of queries.
+        Existing links are kept; Picture links are added as user tags.
+        """
+        objs = list(objs)
+        tag_ids = cls.get_or_create_tags(tag_names)
+        if not objs or not tag_ids:
+            return
+        model = type(objs[0])
+        through, fk = cls._link_table(model)
+        extra = {'source': PictureTag.Source.USER} if model is Picture else {}
+        obj_ids = list(dict.fromkeys(obj.pk for obj in objs))
+        existing = set(
+            through.objects.filter(**{f'{fk}__in': obj_ids, 'tag_id__in': tag_ids}, **extra)
+            .values_list(fk, 'tag_id')
+        )
+        new_links = [(obj_id, tag_id) for obj_id in obj_ids for tag_id in tag_ids if (obj_id, tag_id) not in existing]
+        if not new_links:
+            return
+        through.objects.bulk_create(
+            [through(**{fk: obj_id, 'tag_id': tag_id}, **extra) for obj_id, tag_id in new_links],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        cls.bulk_adjust_usage_counts(Counter(tag_id for _, tag_id in new_links))
+        for obj in objs:
+            if model is Picture:
+                obj._clear_tag_caches()
+            else:
+                obj.__dict__.pop('tag_names_joined', None)
+    
+    @classmethod
+    def recount_usage(cls, tag_ids=None):
+        """
+        Recompute usage_count from the link tables in one UPDATE (repairs drift).
+        Counts PictureTag rows plus Gallery/Album tag links; pass tag_ids to limit the update.
+        """
+        def link_count(through):
+            counts = (
+                through.objects.filter(tag_id=models.OuterRef('pk'))
+                .order_by()
+                .values('tag_id')
+                .annotate(n=models.Count('*'))
+                .values('n')
+            )
+            return Coalesce(models.Subquery(counts), 0)
+
+        queryset = cls.objects.all() if tag_ids is None else cls.objects.filter(id__in=tag_ids)
+        return queryset.update(
+            usage_count=(
+                link_count(PictureTag)
+                + link_count(Gallery.tags.through)
+                + link_count(Album.tags.through)
+            )
+        )
+
+
+class TagResolver:
+    """
+    Request-scoped memo of normalized tag name -> tag id.
+    Misses are resolved in one batch via Tag.get_or_create_tag_ids, so tagging several
+    objects with overlapping names in one request looks each name up only once.
+    """
+    __slots__ = ('_ids',)
+
+    def __init__(self):
+        self._ids = {}
+
+    def tag_ids(self, names):
+        """Tag ids for names (created if missing), deduplicated, in first-seen order"""
+        normalized = [_normalize_tag(name)[0] for name in names or [] if name]
+        missing = [name for name in normalized if name not in self._ids]
+        if missing:
+            self._ids.update(Tag.get_or_create_tag_ids(missing))
+        return list(dict.fromkeys(self._ids[name] for name in normalized if name in self._ids))
 
 
 class PictureTag(models.Model):
@@ -116,6 +407,9 @@ class PictureTag(models.Model):
         ]
         indexes = [
             models.Index(fields=['picture', 'source']),
+            # Reverse lookups (tag -> pictures, optionally per source) and per-source facets
+            models.Index(fields=['tag', 'source'], name='pt_tag_source_idx'),
+            models.Index(fields=['source'], name='pt_source_idx'),
         ]
 
     def __str__(self):
@@ -191,6 +485,13 @@ class Gallery(models.Model):
         indexes = [
             models.Index(fields=['owner', 'gallery_type']),
             models.Index(fields=['deleted_at']),
+            models.Index(fields=['owner', 'deleted_at'], name='gallery_owner_del_idx'),
+            # Partial indexes: listings only ever read live (not soft-deleted) rows
+            models.Index(
+                fields=['owner', 'gallery_type'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='gallery_active_owner_type',
+            ),
         ]
     
     def __str__(self):
@@ -201,30 +502,66 @@ class Gallery(models.Model):
         """Check if gallery is soft deleted"""
         return self.deleted_at is not None
     
-    def soft_delete(self):
-        """Soft delete the gallery"""
+    def soft_delete(self, cascade=False):
+        """Soft delete the gallery (cascade=True also soft deletes its albums and pictures)"""
+        if cascade:
+            Gallery.bulk_soft_delete([self.pk], cascade=True)
+            self.refresh_from_db(fields=['deleted_at'])
+            return
         self.deleted_at = timezone.now()
         self.save(update_fields=['deleted_at'])
     
+    @classmethod
+    @transaction.atomic
+    def bulk_soft_delete(cls, ids, cascade=False):
+        """Soft delete many galleries (ids or a queryset) with one UPDATE per table; returns galleries changed"""
+        now = timezone.now()
+        galleries = cls.objects.filter(pk__in=ids, deleted_at__isnull=True)
+        if cascade:
+            Picture.objects.filter(album__gallery__in=galleries, deleted_at__isnull=True).update(deleted_at=now)
+            Album.objects.filter(gallery__in=galleries, deleted_at__isnull=True).update(deleted_at=now)
+        return galleries.update(deleted_at=now)
+    
     def restore(self):
         """Restore soft deleted gallery"""
         self.deleted_at = None
         self.save(update_fields=['deleted_at'])
     
+    @classmethod
+    def with_album_count(cls, queryset=None):
+        """Annotate album_count (non-deleted albums) so serializers need no per-gallery COUNT."""
+        if queryset is None:
+            queryset = cls.objects.all()
+        if not queryset.query.order_by:
+            # Meta.ordering is not applied to GROUP BY queries; keep pagination stable
+            queryset = queryset.order_by(*cls._meta.ordering)
+        # distinct=True keeps the count right when the queryset already joins (shares, tags)
+        return queryset.annotate(album_count=models.Count(
+            'albums', filter=models.Q(albums__deleted_at__isnull=True), distinct=True
+        ))
+    
+    @cached_property
+    def tag_names_joined(self):
+        """Comma-separated tag names (cached per instance; reset when tags change)"""
+        return ', '.join(self.tags.values_list('name', flat=True))
+    
     def add_tag(self, tag_name):
         """Add a tag to the gallery"""
-        tag, _ = Tag.get_or_create_tag(tag_name)
-        if tag not in self.tags.all():
-            self.tags.add(tag)
+        # The through table's (gallery, tag) uniqueness makes this idempotent without a membership check
+        tag, created = Tag.link_tag(tag_name, self.tags.through, gallery_id=self.pk)
+        if created:
             tag.increment_usage()
+            self.__dict__.pop('tag_names_joined', None)
     
     def remove_tag(self, tag_name):
         """Remove a tag from the gallery"""
         try:
-            tag = Tag.objects.get(slug=slugify(tag_name.lower().strip()))
-            if tag in self.tags.all():
-                self.tags.remove(tag)
+            # Match by slug like add_tag, so other casing/punctuation of the name still finds the tag
+            tag = Tag.objects.only('pk').get(slug=_normalize_tag(tag_name)[1])
+            deleted, _ = self.tags.through.objects.filter(gallery_id=self.pk, tag_id=tag.pk).delete()
+            if deleted:
                 tag.decrement_usage()
+                self.__dict__.pop('tag_names_joined', None)
         except Tag.DoesNotExist:
             raise
     
@@ -236,20 +573,31 @@ class Gallery(models.Model):
             queryset = queryset.filter(owner=user)
         
         if tag_names:
-            queryset = queryset.filter(tags__name__in=tag_names).distinct()
+            queryset = Tag.filter_tagged(queryset, tag_names)
         
         return queryset
     
-    def set_tags(self, tag_names):
-        """Set tags from a list of tag names"""
-        # Remove old tags
-        for tag in self.tags.all():
-            self.tags.remove(tag)
-            tag.decrement_usage()
-        
-        # Add new tags
-        for tag_name in tag_names:
-            self.add_tag(tag_name)
+    @transaction.atomic
+    def set_tags(self, tag_names, resolver=None):
+        """Set tags from a list of tag names (only changed links are written); resolver: optional TagResolver"""
+        links = self.tags.through.objects.filter(gallery_id=self.pk)
+        # Read the link table alone; self.tags.values_list() would join the tag table
+        old_ids = set(links.values_list('tag_id', flat=True))
+        new_ids = resolver.tag_ids(tag_names) if resolver else Tag.get_or_create_tags(tag_names)
+        removed = old_ids.difference(new_ids)
+        added = [tag_id for tag_id in new_ids if tag_id not in old_ids]
+        if removed:
+            links.filter(tag_id__in=removed).delete()
+            Tag.bulk_adjust_usage(removed, -1)
+        if added:
+            # Single INSERT ... ON CONFLICT DO NOTHING; tags.add() would SELECT existing ids first
+            self.tags.through.objects.bulk_create(
+                [self.tags.through(gallery_id=self.pk, tag_id=tag_id) for tag_id in added],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+            Tag.bulk_adjust_usage(added, 1)
+        self.__dict__.pop('tag_names_joined', None)
 
 
 class GalleryShare(models.Model):
@@ -278,6 +626,15 @@ class GalleryShare(models.Model):
         verbose_name = 'Gallery Share'
         verbose_name_plural = 'Gallery Shares'
         ordering = ['-shared_at']
+    
+    @classmethod
+    def shared_with(cls, user, gallery_ref='pk'):
+        """
+        EXISTS condition for rows whose gallery (OuterRef(gallery_ref)) is shared with user.
+        Unlike a shared_with join it yields each row once, so the query needs no DISTINCT; the
+        (gallery, user) unique index answers each probe.
+        """
+        return models.Exists(cls.objects.filter(gallery_id=models.OuterRef(gallery_ref), user=user))
 
 
 class Album(models.Model):
@@ -329,7 +686,17 @@ class Album(models.Model):
         verbose_name_plural = 'Albums'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['gallery', 'deleted_at']),
+            # Live rows per gallery, plus a small index for trash listings
+            models.Index(
+                fields=['gallery'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='album_active_by_gallery',
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='album_trashed',
+            ),
         ]
     
     def __str__(self):
@@ -340,37 +707,100 @@ class Album(models.Model):
         """Check if album is soft deleted"""
         return self.deleted_at is not None
     
-    def soft_delete(self):
-        """Soft delete the album"""
+    def soft_delete(self, cascade=False):
+        """Soft delete the album (cascade=True also soft deletes its pictures)"""
+        if cascade:
+            Album.bulk_soft_delete([self.pk], cascade=True)
+            self.refresh_from_db(fields=['deleted_at'])
+            return
         self.deleted_at = timezone.now()
         self.save(update_fields=['deleted_at'])
     
+    @classmethod
+    @transaction.atomic
+    def bulk_soft_delete(cls, ids, cascade=False):
+        """Soft delete many albums (ids or a queryset) with one UPDATE per table; returns albums changed"""
+        now = timezone.now()
+        albums = cls.objects.filter(pk__in=ids, deleted_at__isnull=True)
+        if cascade:
+            Picture.objects.filter(album__in=albums, deleted_at__isnull=True).update(deleted_at=now)
+        return albums.update(deleted_at=now)
+    
     def restore(self):
         """Restore soft deleted album"""
         self.deleted_at = None
         self.save(update_fields=['deleted_at'])
     
+    @classmethod
+    def with_picture_count(cls, queryset=None):
+        """Annotate picture_count (non-deleted pictures) so serializers need no per-album COUNT."""
+        if queryset is None:
+            queryset = cls.objects.all()
+        if not queryset.query.order_by:
+            queryset = queryset.order_by(*cls._meta.ordering)
+        return queryset.annotate(picture_count=models.Count(
+            'pictures', filter=models.Q(pictures__deleted_at__isnull=True), distinct=True
+        ))
+    
     def update_exif_metadata(self, metadata_dict):
         """Update EXIF metadata, merging with existing"""
+        if connection.vendor == 'postgresql':
+            # Merge in the database (jsonb ||): one atomic UPDATE, no lost updates from concurrent writers
+            Album.objects.filter(pk=self.pk).update(exif_metadata=RawSQL(
+                "COALESCE(exif_metadata, '{}'::jsonb) || %s::jsonb", [json.dumps(metadata_dict)]
+            ))
+            if isinstance(self.exif_metadata, dict):
+                self.exif_metadata.update(metadata_dict)
+            else:
+                self.exif_metadata = dict(metadata_dict)
+            return
         if not isinstance(self.exif_metadata, dict):
             self.exif_metadata = {}
         self.exif_metadata.update(metadata_dict)
         self.save(update_fields=['exif_metadata'])
     
+    @classmethod
+    def bulk_update_exif_metadata(cls, metadata_by_album):
+        """Merge {album_id: metadata_dict} into many albums' EXIF metadata with one UPDATE (two on non-PostgreSQL)"""
+        metadata_by_album = {pk: metadata for pk, metadata in metadata_by_album.items() if metadata}
+        if not metadata_by_album:
+            return
+        if connection.vendor == 'postgresql':
+            cases = ' '.join(['WHEN %s THEN %s::jsonb'] * len(metadata_by_album))
+            params = [value for pk, metadata in metadata_by_album.items() for value in (pk, json.dumps(metadata))]
+            cls.objects.filter(pk__in=list(metadata_by_album)).update(exif_metadata=RawSQL(
+                f"COALESCE(exif_metadata, '{{}}'::jsonb) || CASE id {cases} END", params
+            ))
+            return
+        albums = list(cls.objects.filter(pk__in=list(metadata_by_album)).only('pk', 'exif_metadata'))
+        for album in albums:
+            album.exif_metadata = {
+                **(album.exif_metadata if isinstance(album.exif_metadata, dict) else {}),
+                **metadata_by_album[album.pk],
+            }
+        cls.objects.bulk_update(albums, ['exif_metadata'], batch_size=500)
+    
+    @cached_property
+    def tag_names_joined(self):
+        """Comma-separated tag names (cached per instance; reset when tags change)"""
+        return ', '.join(self.tags.values_list('name', flat=True))
+    
     def add_tag(self, tag_name):
         """Add a tag to the album"""
-        tag, _ = Tag.get_or_create_tag(tag_name)
-        if tag not in self.tags.all():
-            self.tags.add(tag)
+        # The through table's (album, tag) uniqueness makes this idempotent without a membership check
+        tag, created = Tag.link_tag(tag_name, self.tags.through, album_id=self.pk)
+        if created:
             tag.increment_usage()
+            self.__dict__.pop('tag_names_joined', None)
     
     def remove_tag(self, tag_name):
         """Remove a tag from the album"""
         try:
-            tag = Tag.objects.get(slug=slugify(tag_name.lower().strip()))
-            if tag in self.tags.all():
-                self.tags.remove(tag)
+            tag = Tag.objects.only('pk').get(slug=_normalize_tag(tag_name)[1])
+            deleted, _ = self.tags.through.objects.filter(album_id=self.pk, tag_id=tag.pk).delete()
+            if deleted:
                 tag.decrement_usage()
+                self.__dict__.pop('tag_names_joined', None)
         except Tag.DoesNotExist:
             pass
     
@@ -382,20 +812,31 @@ class Album(models.Model):
             queryset = queryset.filter(gallery=gallery)
         
         if tag_names:
-            queryset = queryset.filter(tags__name__in=tag_names).distinct()
+            queryset = Tag.filter_tagged(queryset, tag_names)
         
         return queryset
     
-    def set_tags(self, tag_names):
-        """Set tags from a list of tag names"""
-        # Remove old tags
-        for tag in self.tags.all():
-            self.tags.remove(tag)
-            tag.decrement_usage()
-        
-        # Add new tags
-        for tag_name in tag_names:
-            self.add_tag(tag_name)
+    @transaction.atomic
+    def set_tags(self, tag_names, resolver=None):
+        """Set tags from a list of tag names (only changed links are written); resolver: optional TagResolver"""
+        links = self.tags.through.objects.filter(album_id=self.pk)
+        # Read the link table alone; self.tags.values_list() would join the tag table
+        old_ids = set(links.values_list('tag_id', flat=True))
+        new_ids = resolver.tag_ids(tag_names) if resolver else Tag.get_or_create_tags(tag_names)
+        removed = old_ids.difference(new_ids)
+        added = [tag_id for tag_id in new_ids if tag_id not in old_ids]
+        if removed:
+            links.filter(tag_id__in=removed).delete()
+            Tag.bulk_adjust_usage(removed, -1)
+        if added:
+            # Single INSERT ... ON CONFLICT DO NOTHING; tags.add() would SELECT existing ids first
+            self.tags.through.objects.bulk_create(
+                [self.tags.through(album_id=self.pk, tag_id=tag_id) for tag_id in added],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+            Tag.bulk_adjust_usage(added, 1)
+        self.__dict__.pop('tag_names_joined', None)
 
 
 class Picture(models.Model):
@@ -502,9 +943,19 @@ class Picture(models.Model):
         verbose_name_plural = 'Pictures'
         ordering = ['-uploaded_at']
         indexes = [
-            models.Index(fields=['album', 'deleted_at']),
             models.Index(fields=['taken_at']),
             models.Index(fields=['is_favorite']),
+            # Live rows per album (in default order), plus a small index for trash listings
+            models.Index(
+                fields=['album', '-uploaded_at'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='picture_active_by_album_recent',
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='picture_trashed',
+            ),
         ]
     
     def __str__(self):
@@ -519,58 +970,109 @@ class Picture(models.Model):
         """Soft delete the picture"""
         self.deleted_at = timezone.now()
         self.save(update_fields=['deleted_at'])
+
+    @classmethod
+    def bulk_soft_delete(cls, ids):
+        """Soft delete many pictures (ids or a queryset) in one UPDATE; returns pictures changed"""
+        return cls.objects.filter(pk__in=ids, deleted_at__isnull=True).update(deleted_at=timezone.now())
     
     def restore(self):
         """Restore soft deleted picture"""
         self.deleted_at = None
         self.save(update_fields=['deleted_at'])
     
-    @property
-    def user_tags(self):
-        """Tag queryset for user-added tags (source='user')."""
+    @staticmethod
+    def tag_sources_prefetch():
+        """Prefetch of tag_links with their Tag, as used by with_tag_sources()."""
+        return models.Prefetch('tag_links', queryset=PictureTag.objects.select_related('tag'))
+
+    @classmethod
+    def with_tag_sources(cls, queryset=None):
+        """Prefetch tag_links (with their Tag) so user_tags / ai_tags / exif_tags / all_tags need no queries."""
+        if queryset is None:
+            queryset = cls.objects.all()
+        return queryset.prefetch_related(cls.tag_sources_prefetch())
+
+    def _prefetched_tag_links(self):
+        """Prefetched PictureTag rows, or None if with_tag_sources() was not used."""
+        return getattr(self, '_prefetched_objects_cache', {}).get('tag_links')
+
+    def _clear_tag_caches(self):
+        """Drop per-instance tag caches after this picture's tags change."""
+        self.__dict__.pop('tag_names_joined', None)
+        getattr(self, '_prefetched_objects_cache', {}).pop('tag_links', None)
+
+    def _tags_for_source(self, source):
+        """Tags of one source: from prefetched tag_links if available, else a queryset."""
+        links = self._prefetched_tag_links()
+        if links is not None:
+            tags = {link.tag_id: link.tag for link in links if link.source == source}
+            return sorted(tags.values(), key=lambda tag: tag.name)
         return Tag.objects.filter(
             picture_tag_links__picture=self,
-            picture_tag_links__source=PictureTag.Source.USER,
+            picture_tag_links__source=source,
         ).distinct()
 
+    @property
+    def user_tags(self):
+        """Tags for user-added tags (source='user')."""
+        return self._tags_for_source(PictureTag.Source.USER)
+
     @property
     def ai_tags(self):
-        """Tag queryset for AI-added tags (source='ai')."""
-        return Tag.objects.filter(
-            picture_tag_links__picture=self,
-            picture_tag_links__source=PictureTag.Source.AI,
-        ).distinct()
+        """Tags for AI-added tags (source='ai')."""
+        return self._tags_for_source(PictureTag.Source.AI)
 
     @property
     def exif_tags(self):
-        """Tag queryset for EXIF-derived tags (source='exif')."""
-        return Tag.objects.filter(
-            picture_tag_links__picture=self,
-            picture_tag_links__source=PictureTag.Source.EXIF,
-        ).distinct()
+        """Tags for EXIF-derived tags (source='exif')."""
+        return self._tags_for_source(PictureTag.Source.EXIF)
+
+    @cached_property
+    def tag_names_joined(self):
+        """Comma-separated user tag names (cached per instance; reset when user tags change)."""
+        return ', '.join(tag.name for tag in self.user_tags)
 
     @property
     def all_tags(self):
         """List of all tag names (user + AI)."""
-        names = list(self.tags.values_list('name', flat=True))
-        return list(dict.fromkeys(names))  # preserve order, dedupe
+        links = self._prefetched_tag_links()
+        if links is not None:
+            return sorted({link.tag.name for link in links})
+        # A tag linked from several sources appears once per source; dedupe in SQL
+        return list(self.tags.order_by('name').values_list('name', flat=True).distinct())
+
+    @classmethod
+    def all_tags_by_pk(cls, pictures):
+        """
+        {picture pk: sorted tag names (all sources)} for many pictures in one pass.
+        Prefetched tag_links are used where present; the rest share a single query.
+        """
+        names = defaultdict(set)
+        missing = []
+        for picture in pictures:
+            links = picture._prefetched_tag_links()
+            if links is None:
+                missing.append(picture.pk)
+            else:
+                names[picture.pk].update(link.tag.name for link in links)
+        if missing:
+            rows = PictureTag.objects.filter(picture_id__in=missing).values_list('picture_id', 'tag__name')
+            for picture_id, name in rows:
+                names[picture_id].add(name)
+        return {picture.pk: sorted(names.get(picture.pk, ())) for picture in pictures}
 
     def add_tag(self, tag_name):
         """Add a user-defined tag to the picture (source='user')."""
-        tag, _ = Tag.get_or_create_tag(tag_name)
-        _, created = PictureTag.objects.get_or_create(
-            picture=self,
-            tag=tag,
-            source=PictureTag.Source.USER,
-            defaults={},
-        )
+        tag, created = Tag.link_tag(tag_name, PictureTag, picture_id=self.pk, source=PictureTag.Source.USER)
         if created:
             tag.increment_usage()
+            self._clear_tag_caches()
 
     def remove_tag(self, tag_name):
         """Remove a user-defined tag from the picture."""
         try:
-            tag = Tag.objects.get(slug=slugify(tag_name.lower().strip()))
+            tag = Tag.objects.only('pk').get(slug=_normalize_tag(tag_name)[1])
             deleted = PictureTag.objects.filter(
                 picture=self,
                 tag=tag,
@@ -578,6 +1080,7 @@ class Picture(models.Model):
             ).delete()
             if deleted[0]:
                 tag.decrement_usage()
+                self._clear_tag_caches()
         except Tag.DoesNotExist:
             pass
 
@@ -588,37 +1091,47 @@ class Picture(models.Model):
         if album:
             queryset = queryset.filter(album=album)
         if user:
-            queryset = queryset.filter(album__gallery__owner=user)
+            # IN (owned gallery ids) instead of a two-level join; served by gallery_owner_del_idx
+            queryset = queryset.filter(album__gallery_id__in=Gallery.objects.filter(owner=user).values('id'))
         if tag_names:
-            queryset = queryset.filter(tags__name__in=tag_names).distinct()
+            queryset = Tag.filter_tagged(queryset, tag_names)
         return queryset
 
-    def set_tags(self, tag_names):
-        """Set user tags from a list of tag names (replaces existing user tags)."""
-        # Remove existing user tag links and decrement usage
-        for pt in PictureTag.objects.filter(picture=self, source=PictureTag.Source.USER).select_related('tag'):
-            pt.tag.decrement_usage()
-        PictureTag.objects.filter(picture=self, source=PictureTag.Source.USER).delete()
-        # Add new user tags
-        for tag_name in tag_names:
-            self.add_tag(tag_name)
+    @transaction.atomic
+    def _replace_tags(self, source, tag_names, resolver=None):
+        """Replace all tags of one source in bulk, writing only the links that change."""
+        links = PictureTag.objects.filter(picture=self, source=source)
+        old_ids = set(links.values_list('tag_id', flat=True))
+        new_ids = resolver.tag_ids(tag_names) if resolver else Tag.get_or_create_tags(tag_names)
+        removed = old_ids.difference(new_ids)
+        added = [tag_id for tag_id in new_ids if tag_id not in old_ids]
+        if removed:
+            links.filter(tag_id__in=removed).delete()
+            Tag.bulk_adjust_usage(removed, -1)
+        if added:
+            PictureTag.objects.bulk_create(
+                [PictureTag(picture=self, tag_id=tag_id, source=source) for tag_id in added],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+            Tag.bulk_adjust_usage(added, 1)
+        self._clear_tag_caches()
+
+    def set_tags(self, tag_names, resolver=None):
+        """Set user tags from a list of tag names (replaces existing user tags); resolver: optional TagResolver"""
+        self._replace_tags(PictureTag.Source.USER, tag_names, resolver)
 
     def add_ai_tag(self, tag_name):
-        """Add an AI-generated tag (source='ai')."""
-        tag, _ = Tag.get_or_create_tag(tag_name)
-        created = PictureTag.objects.get_or_create(
-            picture=self,
-            tag=tag,
-            source=PictureTag.Source.AI,
-            defaults={},
-        )[1]
+        """Add an AI-generated tag (source='ai'). Pipelines adding many tags should use bulk_add_tags()."""
+        tag, created = Tag.link_tag(tag_name, PictureTag, picture_id=self.pk, source=PictureTag.Source.AI)
         if created:
             tag.increment_usage()
+            self._clear_tag_caches()
 
     def remove_ai_tag(self, tag_name):
         """Remove an AI-generated tag."""
         try:
-            tag = Tag.objects.get(slug=slugify(tag_name.lower().strip()))
+            tag = Tag.objects.only('pk').get(slug=_normalize_tag(tag_name)[1])
             deleted = PictureTag.objects.filter(
                 picture=self,
                 tag=tag,
@@ -626,37 +1139,59 @@ class Picture(models.Model):
             ).delete()
             if deleted[0]:
                 tag.decrement_usage()
+                self._clear_tag_caches()
         except Tag.DoesNotExist:
             pass
 
     def set_ai_tags(self, tag_names):
         """Replace AI tags with the given list of tag names (e.g. from YOLO)."""
-        for pt in PictureTag.objects.filter(picture=self, source=PictureTag.Source.AI).select_related('tag'):
-            pt.tag.decrement_usage()
-        PictureTag.objects.filter(picture=self, source=PictureTag.Source.AI).delete()
-        for tag_name in (tag_names or []):
-            name = (tag_name or '').strip()
-            if name:
-                self.add_ai_tag(name)
+        self._replace_tags(PictureTag.Source.AI, tag_names)
 
     def add_exif_tag(self, tag_name):
-        """Add an EXIF-derived tag (source='exif')."""
-        tag, _ = Tag.get_or_create_tag(tag_name)
-        created = PictureTag.objects.get_or_create(
-            picture=self,
-            tag=tag,
-            source=PictureTag.Source.EXIF,
-            defaults={},
-        )[1]
+        """Add an EXIF-derived tag (source='exif'). Pipelines adding many tags should use bulk_add_tags()."""
+        tag, created = Tag.link_tag(tag_name, PictureTag, picture_id=self.pk, source=PictureTag.Source.EXIF)
         if created:
             tag.increment_usage()
+            self._clear_tag_caches()
 
     def set_exif_tags(self, tag_names):
         """Replace EXIF tags with the given list of tag names (e.g. from EXIF extraction)."""
-        for pt in PictureTag.objects.filter(picture=self, source=PictureTag.Source.EXIF).select_related('tag'):
-            pt.tag.decrement_usage()
-        PictureTag.objects.filter(picture=self, source=PictureTag.Source.EXIF).delete()
-        for tag_name in (tag_names or []):
-            name = (tag_name or '').strip()
-            if name:
-                self.add_exif_tag(name)
+        self._replace_tags(PictureTag.Source.EXIF, tag_names)
+
+    @transaction.atomic
+    def bulk_add_tags(self, pairs):
+        """
+        Add many (tag_name, source) pairs at once, keeping existing links.
+        One tag lookup/insert, one PictureTag insert and one usage_count UPDATE per distinct count.
+        """
+        pairs = [(name, source) for name, source in pairs or [] if name]
+        name_to_id = Tag.get_or_create_tag_ids([name for name, _ in pairs])
+        wanted = {}  # (tag_id, source) -> None, deduped in input order
+        for name, source in pairs:
+            tag_id = name_to_id.get(_normalize_tag(name)[0])
+            if tag_id is not None:
+                wanted.setdefault((tag_id, source))
+        if not wanted:
+            return
+        existing = set(
+            PictureTag.objects.filter(picture=self, tag_id__in={tag_id for tag_id, _ in wanted})
+            .values_list('tag_id', 'source')
+        )
+        new_links = [link for link in wanted if link not in existing]
+        if not new_links:
+            return
+        PictureTag.objects.bulk_create(
+            [PictureTag(picture=self, tag_id=tag_id, source=source) for tag_id, source in new_links],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        # usage_count counts links, so a tag added under two sources goes up by 2
+        Tag.bulk_adjust_usage_counts(Counter(tag_id for tag_id, _ in new_links))
+        self._clear_tag_caches()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def _evict_cached_tag(sender, instance, **kwargs):
+    """Drop a saved/deleted Tag from the process-local lookup cache (its slug or name may have changed)"""
+    _evict_tag(instance.pk)
@@ -3,8 +3,9 @@ DRF serializers for Gallery API
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Prefetch
 from .models import Gallery, Album, Picture, GalleryShare, Tag
-from .utils import generate_signed_url
+from .utils import generate_signed_urls
 
 User = get_user_model()
 
@@ -21,7 +22,11 @@ class TagListField(serializers.Field):
     """Custom field to handle tags as list of names"""
     def to_representation(self, value):
         """Convert Tag queryset to list of tag names"""
-        return [tag.name for tag in value.all()]
+        prefetched = getattr(value.instance, '_prefetched_objects_cache', {})
+        if value.prefetch_cache_name in prefetched:
+            return [tag.name for tag in value.all()]
+        # Not prefetched: fetch plain strings instead of building Tag instances
+        return list(value.values_list('name', flat=True))
     
     def to_internal_value(self, data):
         """Convert list of tag names to Tag objects"""
@@ -69,22 +74,36 @@ class PictureSerializer(serializers.ModelSerializer):
         ]
 
     def get_signed_url(self, obj):
-        """Generate signed URL for the picture"""
+        """Generate signed URL for the picture (signed in one batch for the whole list)"""
         if not obj.seaweedfs_file_id:
             return None
-        try:
-            signed = generate_signed_url(obj.seaweedfs_file_id)
-            return signed['url']
-        except Exception:
-            return None
+        urls = self.context.setdefault('_signed_urls', {})
+        if obj.seaweedfs_file_id not in urls:
+            file_ids = [obj.seaweedfs_file_id]
+            if isinstance(self.parent, serializers.ListSerializer) and self.parent.instance is not None:
+                file_ids += [p.seaweedfs_file_id for p in self.parent.instance if p.seaweedfs_file_id]
+            try:
+                urls.update(
+                    (file_id, signed['url'])
+                    for file_id, signed in generate_signed_urls(dict.fromkeys(file_ids)).items()
+                )
+            except Exception:
+                return None
+        return urls.get(obj.seaweedfs_file_id)
 
     def get_ai_tags(self, obj):
         """AI-added tag names (e.g. from YOLO)"""
         return [tag.name for tag in obj.ai_tags]
 
     def get_all_tags(self, obj):
-        """Get all tag names (user + AI)"""
-        return obj.all_tags
+        """Get all tag names (user + AI), merged in one pass for the whole list"""
+        names = self.context.setdefault('_all_tags_by_pk', {})
+        if obj.pk not in names:
+            pictures = [obj]
+            if isinstance(self.parent, serializers.ListSerializer) and self.parent.instance is not None:
+                pictures += [p for p in self.parent.instance if p.pk not in names]
+            names.update(Picture.all_tags_by_pk(pictures))
+        return names[obj.pk]
     
     def update(self, instance, validated_data):
         """Handle tag updates"""
@@ -92,7 +111,7 @@ class PictureSerializer(serializers.ModelSerializer):
         instance = super().update(instance, validated_data)
         
         if tags_data is not None:
-            instance.set_tags(tags_data)
+            instance.set_tags(tags_data, resolver=self.context.get('tag_resolver'))
         
         return instance
     
@@ -102,13 +121,16 @@ class PictureSerializer(serializers.ModelSerializer):
         instance = super().create(validated_data)
         
         if tags_data:
-            instance.set_tags(tags_data)
+            instance.set_tags(tags_data, resolver=self.context.get('tag_resolver'))
         
         return instance
 
 
 class AlbumSerializer(serializers.ModelSerializer):
-    """Serializer for Album model"""
+    """
+    Serializer for Album model.
+    Pass querysets through Album.with_picture_count() so picture_count is read from the annotation.
+    """
     picture_count = serializers.SerializerMethodField()
     tags = TagListField()
     gallery_name = serializers.CharField(source='gallery.name', read_only=True)
@@ -123,8 +145,12 @@ class AlbumSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_picture_count(self, obj):
-        """Get count of non-deleted pictures"""
-        return obj.pictures.filter(deleted_at__isnull=True).count()
+        """Get count of non-deleted pictures (annotated value if present, else one COUNT query)"""
+        count = getattr(obj, 'picture_count', None)
+        if count is None:
+            # COUNT(id) rather than COUNT(*): only the primary key needs to be read
+            count = obj.pictures.filter(deleted_at__isnull=True).aggregate(n=Count('id'))['n']
+        return count
     
     def update(self, instance, validated_data):
         """Handle tag updates"""
@@ -132,7 +158,7 @@ class AlbumSerializer(serializers.ModelSerializer):
         instance = super().update(instance, validated_data)
         
         if tags_data is not None:
-            instance.set_tags(tags_data)
+            instance.set_tags(tags_data, resolver=self.context.get('tag_resolver'))
         
         return instance
     
@@ -142,7 +168,7 @@ class AlbumSerializer(serializers.ModelSerializer):
         instance = super().create(validated_data)
         
         if tags_data:
-            instance.set_tags(tags_data)
+            instance.set_tags(tags_data, resolver=self.context.get('tag_resolver'))
         
         return instance
 
@@ -167,7 +193,10 @@ class GalleryShareSerializer(serializers.ModelSerializer):
 
 
 class GallerySerializer(serializers.ModelSerializer):
-    """Serializer for Gallery model"""
+    """
+    Serializer for Gallery model.
+    Pass querysets through Gallery.with_album_count() so album_count is read from the annotation.
+    """
     owner_username = serializers.CharField(source='owner.username', read_only=True)
     album_count = serializers.SerializerMethodField()
     tags = TagListField(required=False, allow_null=True)
@@ -183,8 +212,11 @@ class GallerySerializer(serializers.ModelSerializer):
         read_only_fields = ['owner', 'created_at', 'updated_at']
     
     def get_album_count(self, obj):
-        """Get count of non-deleted albums"""
-        return obj.albums.filter(deleted_at__isnull=True).count()
+        """Get count of non-deleted albums (annotated value if present, else one COUNT query)"""
+        count = getattr(obj, 'album_count', None)
+        if count is None:
+            count = obj.albums.filter(deleted_at__isnull=True).aggregate(n=Count('id'))['n']
+        return count
     
     def update(self, instance, validated_data):
         """Handle tag updates"""
@@ -192,7 +224,7 @@ class GallerySerializer(serializers.ModelSerializer):
         instance = super().update(instance, validated_data)
         
         if tags_data is not None:
-            instance.set_tags(tags_data)
+            instance.set_tags(tags_data, resolver=self.context.get('tag_resolver'))
         
         return instance
     
@@ -202,7 +234,7 @@ class GallerySerializer(serializers.ModelSerializer):
         instance = super().create(validated_data)
         
         if tags_data:
-            instance.set_tags(tags_data)
+            instance.set_tags(tags_data, resolver=self.context.get('tag_resolver'))
         
         return instance
 
@@ -213,3 +245,25 @@ class GalleryDetailSerializer(GallerySerializer):
     
     class Meta(GallerySerializer.Meta):
         fields = GallerySerializer.Meta.fields + ['albums']
+
+
+def get_prefetch_for(serializer_class):
+    """
+    prefetch_related() lookups that let serializer_class render many objects without per-row queries.
+    Forward FKs (owner, gallery, album) are left to select_related() in the viewsets.
+    """
+    if issubclass(serializer_class, GallerySerializer):
+        lookups = ['tags', Prefetch('shares', queryset=GalleryShare.objects.select_related('user'))]
+        if issubclass(serializer_class, GalleryDetailSerializer):
+            # Same rows as the unprefetched gallery.albums.all(): soft-deleted albums are still listed
+            albums = Album.objects.prefetch_related('tags')
+            lookups.append(Prefetch('albums', queryset=Album.with_picture_count(albums)))
+        return lookups
+    if issubclass(serializer_class, AlbumSerializer):
+        lookups = ['tags']
+        if issubclass(serializer_class, AlbumDetailSerializer):
+            lookups.append(Prefetch('pictures', queryset=Picture.with_tag_sources()))
+        return lookups
+    if issubclass(serializer_class, PictureSerializer):
+        return [Picture.tag_sources_prefetch()]
+    return []
@@ -2,118 +2,462 @@
 Celery tasks for the gallery app.
 
 - GPU task: process_picture_ai — YOLO (ai_tags) + PaddleOCR (ocr_text). Route to 'gpu'.
+  Models are loaded once per worker process (warmed up in worker_process_init).
+  process_picture_ai_batch runs the same pipeline over several pictures (see queue_picture_ai).
 - CPU task: extract_picture_exif — EXIF metadata (camera, location, etc.) as tags. Route to 'cpu'.
+- CPU task: recount_tag_usage — nightly (celery beat) rebuild of Tag.usage_count from the link tables.
 """
+import contextlib
+import fcntl
 import io
 import logging
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 
+from celery.signals import worker_process_init
+from django.conf import settings
 from django.core.files.storage import default_storage
+from django.db import transaction
 from django.utils import timezone
 
 from config.celery import app
 
 logger = logging.getLogger(__name__)
 
+# Inference models are loaded lazily once per worker process and reused across tasks
+_YOLO_MODEL = None
+_PADDLE_OCR = None
+_MODEL_LOCK = threading.Lock()
+# Single long-lived thread that loads and runs PaddleOCR, so the pipeline always runs on the thread it was built on
+_OCR_EXECUTOR = None
+
+# Reusable pinned host buffer for YOLO inputs (AI_BATCH_SIZE x 640 x 640 x 3 uint8), allocated on first use
+_YOLO_PINNED_INPUT = None
+YOLO_IMGSZ = 640
+# Side CUDA stream for YOLO so its kernels overlap with PaddleOCR (which runs on Paddle's own stream)
+_YOLO_STREAM = None
+
+# libturbojpeg decoder (optional PyTurboJPEG); False once it is known to be unavailable
+_TURBO_JPEG = None
+
+# Pictures per YOLO/PaddleOCR predict() call; small batches already lift GPU utilization well above bs=1
+AI_BATCH_SIZE = 4
+# Pictures per queued task: several inference batches, so storage reads overlap with inference
+AI_TASK_PICTURES = 4 * AI_BATCH_SIZE
+
 # EXIF tag IDs (Pillow / standard EXIF)
 EXIF_MAKE = 271
 EXIF_MODEL = 272
 EXIF_DATETIME_ORIGINAL = 36867
 EXIF_GPS_INFO = 34853
+# Bytes read before trying EXIF; Pillow parses headers and APP1 without touching the pixel data
+EXIF_PREFIX_BYTES = 256 * 1024
 
 
-def _run_yolo(image_bytes):
-    """Run YOLO object detection on image bytes. Returns list of detected class names (ai_tags)."""
+def _tensorrt_cache_dir():
+    """
+    Engine cache directory for this GPU (e.g. <cache>/sm86_fp16), or None when TensorRT
+    is disabled or the GPU has no fast FP16 path (below sm_75), which keeps the FP32 models.
+    """
+    if not getattr(settings, 'GALLERY_AI_TENSORRT', False):
+        return None
     try:
-        from ultralytics import YOLO
-        import numpy as np
-        from PIL import Image
+        import torch
     except ImportError:
-        logger.debug("ultralytics not available, skipping YOLO")
+        return None
+    if not torch.cuda.is_available():
+        return None
+    major, minor = torch.cuda.get_device_capability(0)
+    if (major, minor) < (7, 5):
+        return None
+    return Path(settings.GALLERY_AI_MODEL_CACHE_DIR) / f"sm{major}{minor}_fp16"
+
+
+def _yolo_engine_path(cache_dir):
+    """Path of the YOLO TensorRT FP16 engine in cache_dir."""
+    return cache_dir / 'yolov8n.engine'
+
+
+def export_yolo_engine():
+    """
+    Build the YOLO TensorRT FP16 engine for this GPU unless it is already cached.
+    Takes minutes, so it runs from the build_yolo_engine command, never at worker start.
+    Returns the engine path, or None when TensorRT is disabled or unsupported on this GPU.
+    """
+    cache_dir = _tensorrt_cache_dir()
+    if cache_dir is None:
+        return None
+    engine = _yolo_engine_path(cache_dir)
+    if engine.exists():
+        return engine
+    from ultralytics import YOLO
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Several hosts may share the cache dir; only one of them exports
+    with open(cache_dir / '.export.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not engine.exists():
+            exported = YOLO('yolov8n.pt').export(
+                format='engine', half=True, device=0, imgsz=YOLO_IMGSZ, dynamic=True, batch=AI_BATCH_SIZE,
+            )
+            shutil.move(exported, engine)
+    return engine
+
+
+def _load_yolo(YOLO):
+    """YOLO as the cached TensorRT FP16 engine when enabled and already built, else the FP32 PyTorch model."""
+    cache_dir = _tensorrt_cache_dir()
+    if cache_dir is not None:
+        engine = _yolo_engine_path(cache_dir)
+        if not engine.exists():
+            logger.warning("No YOLO TensorRT engine at %s (run manage.py build_yolo_engine), using PyTorch FP32", engine)
+        else:
+            try:
+                return YOLO(str(engine), task='detect')
+            except Exception as e:
+                logger.warning("TensorRT YOLO engine unavailable, using PyTorch FP32: %s", e)
+    return YOLO('yolov8n.pt')
+
+
+def _get_yolo():
+    """Return the process-wide YOLO model, loading it on first use (None if ultralytics is unavailable)."""
+    global _YOLO_MODEL
+    if _YOLO_MODEL is None:
+        try:
+            from ultralytics import YOLO
+        except ImportError:
+            logger.debug("ultralytics not available, skipping YOLO")
+            return None
+        with _MODEL_LOCK:
+            if _YOLO_MODEL is None:
+                _YOLO_MODEL = _load_yolo(YOLO)
+    return _YOLO_MODEL
+
+
+def _load_ocr(PaddleOCR):
+    """PaddleOCR on its TensorRT FP16 high-performance-inference backend when enabled, else the default backend."""
+    if _tensorrt_cache_dir() is not None:
+        try:
+            return PaddleOCR(
+                use_textline_orientation=True,
+                lang='en',
+                enable_hpi=True,
+                hpi_config={'backend': 'tensorrt', 'backend_config': {'precision': 'fp16'}},
+            )
+        except Exception as e:
+            logger.warning("PaddleOCR TensorRT backend unavailable, using the default backend: %s", e)
+    return PaddleOCR(use_textline_orientation=True, lang='en')
+
+
+def _get_ocr():
+    """Return the process-wide PaddleOCR pipeline, loading it on first use (None if paddleocr is unavailable)."""
+    global _PADDLE_OCR
+    if _PADDLE_OCR is None:
+        try:
+            from paddleocr import PaddleOCR
+        except ImportError as e:
+            logger.debug("paddleocr not available, skipping OCR: %s", e)
+            return None
+        with _MODEL_LOCK:
+            if _PADDLE_OCR is None:
+                _PADDLE_OCR = _load_ocr(PaddleOCR)
+    return _PADDLE_OCR
+
+
+def _get_ocr_executor():
+    """Return this process's PaddleOCR thread, starting it on first use."""
+    global _OCR_EXECUTOR
+    if _OCR_EXECUTOR is None:
+        with _MODEL_LOCK:
+            if _OCR_EXECUTOR is None:
+                _OCR_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='paddleocr')
+    return _OCR_EXECUTOR
+
+
+def _load_ocr_on_its_thread():
+    """Load PaddleOCR on the OCR thread, where every later predict() call runs."""
+    return _get_ocr_executor().submit(_get_ocr).result()
+
+
+@worker_process_init.connect
+def _warm_up_models(**kwargs):
+    """Load inference models in each worker child that consumes the 'gpu' queue, before its first task."""
+    consume_from = app.amqp.queues.consume_from
+    if consume_from and 'gpu' not in consume_from:
+        return
+    for loader in (_get_yolo, _load_ocr_on_its_thread):
+        try:
+            loader()
+        except Exception as e:
+            logger.warning("Model warm-up failed (%s): %s", loader.__name__, e)
+
+
+def _yolo_tag_names(result):
+    """Distinct class names detected in one YOLO result, in detection order."""
+    if result.boxes is None or not result.names:
         return []
+    # tolist() copies all class ids to the host in one transfer; dict.fromkeys dedupes in order
+    names = (result.names.get(cls_id) for cls_id in result.boxes.cls.int().tolist())
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def _ocr_page_text(page):
+    """Join the recognized text lines of one PaddleOCR result."""
+    if not page:
+        return ""
+    lines = []
+    for line in page:
+        if line and len(line) >= 2 and line[1]:
+            lines.append(line[1][0])
+    return "\n".join(lines).strip() if lines else ""
+
+
+def _yolo_input_tensor(images):
+    """
+    Letterbox decoded images into a pinned host buffer and copy them to the GPU asynchronously.
+    Returns a (N, 3, 640, 640) float CUDA tensor in [0, 1] for YOLO, or None (caller passes the
+    arrays instead) without CUDA/OpenCV or for batches larger than the buffer.
+    Only class names are read from the results, so boxes staying in letterboxed coordinates is fine.
+    """
+    global _YOLO_PINNED_INPUT
+    try:
+        import cv2
+        import torch
+    except ImportError:
+        return None
+    if not torch.cuda.is_available() or len(images) > AI_BATCH_SIZE:
+        return None
+    if _YOLO_PINNED_INPUT is None:
+        _YOLO_PINNED_INPUT = torch.empty(
+            (AI_BATCH_SIZE, YOLO_IMGSZ, YOLO_IMGSZ, 3), dtype=torch.uint8, pin_memory=True,
+        )
+    host = _letterbox_into(_YOLO_PINNED_INPUT[:len(images)], images, cv2, torch)
+    # Pinned memory lets the H2D copy run as cudaMemcpyAsync; normalization then happens on the GPU
+    device_input = host.to('cuda', non_blocking=True)
+    return device_input.permute(0, 3, 1, 2).float().div_(255).contiguous()
+
+
+def _letterbox_into(host, images, cv2, torch):
+    """
+    Letterbox RGB arrays into the (N, 640, 640, 3) uint8 tensor host, keeping RGB order:
+    ultralytics uses tensor input as-is, unlike numpy input which it reads as BGR.
+    """
+    host.fill_(114)  # ultralytics' letterbox padding value
+    for i, img_np in enumerate(images):
+        height, width = img_np.shape[:2]
+        ratio = min(YOLO_IMGSZ / height, YOLO_IMGSZ / width)
+        new_h, new_w = round(height * ratio), round(width * ratio)
+        top, left = (YOLO_IMGSZ - new_h) // 2, (YOLO_IMGSZ - new_w) // 2
+        resized = cv2.resize(img_np, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        host[i, top:top + new_h, left:left + new_w].copy_(torch.from_numpy(resized))
+    return host
+
+
+def _yolo_stream():
+    """Context manager that makes the process-wide YOLO CUDA stream current (no-op without CUDA)."""
+    global _YOLO_STREAM
+    try:
+        import torch
+    except ImportError:
+        return contextlib.nullcontext()
+    if not torch.cuda.is_available():
+        return contextlib.nullcontext()
+    if _YOLO_STREAM is None:
+        _YOLO_STREAM = torch.cuda.Stream()
+    return torch.cuda.stream(_YOLO_STREAM)
+
+
+def _run_yolo(images):
+    """
+    Run YOLO object detection on a batch of decoded RGB arrays in one predict() call.
+    Returns one list of detected class names (ai_tags) per input image.
+    """
     try:
-        img = Image.open(io.BytesIO(image_bytes)).convert('RGB')
-        img_np = np.array(img)
-        model = YOLO('yolov8n.pt')
-        results = model.predict(source=img_np, verbose=False)
-        tags = []
-        for r in results:
-            if r.boxes is not None and r.names:
-                for cls_id in r.boxes.cls.int().tolist():
-                    name = r.names.get(int(cls_id))
-                    if name and name not in tags:
-                        tags.append(name)
-        return tags
+        model = _get_yolo()
+        if model is None:
+            return [[] for _ in images]
+        with _yolo_stream():
+            try:
+                source = _yolo_input_tensor(images)
+            except Exception as e:
+                logger.debug("Pinned YOLO input unavailable, passing arrays: %s", e)
+                source = None
+            if source is None:
+                # Ultralytics letterboxes each array itself, so differently sized images can share a batch.
+                # It reads numpy arrays as BGR (OpenCV order): flip the channels so it sees the same
+                # colours as the RGB tensor path
+                source = [img_np[..., ::-1] for img_np in images]
+            results = model.predict(source=source, verbose=False, batch=len(images))
+            # Reading the class ids copies them to the host, which waits for the stream
+            return [_yolo_tag_names(result) for result in results]
     except Exception as e:
         logger.warning("YOLO inference failed: %s", e)
-        return []
+        return [[] for _ in images]
 
 
-def _run_paddleocr(image_bytes):
-    """Run PaddleOCR on image bytes. Returns extracted text string (ocr_text)."""
+def _run_paddleocr(images):
+    """
+    Run PaddleOCR on a batch of decoded RGB arrays in one predict() call.
+    Returns one extracted text string (ocr_text) per input image.
+    """
+    texts = ["" for _ in images]
     try:
-        from paddleocr import PaddleOCR
-        import numpy as np
-        from PIL import Image
+        ocr = _get_ocr()
+        if ocr is None:
+            return texts
+        for i, page in enumerate(ocr.predict(list(images)) or []):
+            texts[i] = _ocr_page_text(page)
+        return texts
+    except Exception as e:
+        logger.warning("PaddleOCR failed: %s", e, exc_info=True)
+        return ["" for _ in images]
+
+
+def _read_picture_bytes(picture):
+    """Read a picture's image from default_storage; None (logged) if it has no file or cannot be read."""
+    path = picture.seaweedfs_file_id
+    if not path:
+        logger.warning("Picture %s has no seaweedfs_file_id, skipping AI processing", picture.pk)
+        return None
+    try:
+        with default_storage.open(path, 'rb') as f:
+            return f.read()
+    except Exception as e:
+        logger.warning("Could not open image for picture %s: %s", picture.pk, e)
+        return None
+
+
+def _get_turbojpeg():
+    """Return the process-wide TurboJPEG decoder, or None if PyTurboJPEG/libturbojpeg is not installed."""
+    global _TURBO_JPEG
+    if _TURBO_JPEG is None:
+        try:
+            from turbojpeg import TurboJPEG
+            _TURBO_JPEG = TurboJPEG()
+        except (ImportError, OSError, RuntimeError) as e:
+            logger.debug("PyTurboJPEG not available, decoding JPEGs with Pillow: %s", e)
+            _TURBO_JPEG = False
+    return _TURBO_JPEG or None
+
+
+def _decode_rgb(image_bytes):
+    """Decode image bytes to an RGB numpy array: libjpeg-turbo for JPEGs when available, Pillow otherwise."""
+    import numpy as np
+    from PIL import Image
+
+    if image_bytes[:2] == b'\xff\xd8':
+        turbo = _get_turbojpeg()
+        if turbo is not None:
+            try:
+                from turbojpeg import TJPF_RGB
+                return turbo.decode(image_bytes, pixel_format=TJPF_RGB)
+            except Exception as e:
+                # e.g. CMYK or truncated JPEGs that Pillow still handles
+                logger.debug("TurboJPEG decode failed, falling back to Pillow: %s", e)
+    return np.asarray(Image.open(io.BytesIO(image_bytes)).convert('RGB'))
+
+
+def _load_picture_image(picture):
+    """
+    Read and decode a picture once into an RGB numpy array shared by YOLO and PaddleOCR.
+    Returns None (logged) if the file is missing, unreadable or not a decodable image.
+    """
+    try:
+        import numpy  # noqa: F401
+        import PIL  # noqa: F401
     except ImportError as e:
-        logger.debug("paddleocr/PIL not available, skipping OCR: %s", e)
-        return ""
+        logger.debug("numpy/PIL not available, skipping AI processing: %s", e)
+        return None
+    image_bytes = _read_picture_bytes(picture)
+    if not image_bytes:
+        return None
     try:
-        img = Image.open(io.BytesIO(image_bytes)).convert('RGB')
-        img_np = np.array(img)
-        ocr = PaddleOCR(use_textline_orientation=True, lang='en')
-        result = ocr.predict(img_np)
-        if not result or not result[0]:
-            return ""
-        lines = []
-        for line in result[0]:
-            if line and len(line) >= 2 and line[1]:
-                lines.append(line[1][0])
-        return "\n".join(lines).strip() if lines else ""
+        # The encoded bytes are dropped as soon as this returns; only the decoded array is kept
+        return _decode_rgb(image_bytes)
     except Exception as e:
-        logger.warning("PaddleOCR failed: %s", e, exc_info=True)
-        return ""
+        logger.warning("Could not decode image for picture %s: %s", picture.pk, e)
+        return None
 
 
-@app.task(bind=True, queue='gpu')
-def process_picture_ai(self, picture_id):
+def _infer_and_store(pictures, decoded):
+    """Run YOLO and PaddleOCR once over one inference batch and store the per-picture results."""
+    batch = [(picture, img_np) for picture, img_np in zip(pictures, decoded) if img_np is not None]
+    if not batch:
+        return
+    pictures = [picture for picture, _ in batch]
+    images = [img_np for _, img_np in batch]
+    del batch
+    decoded.clear()  # the caller's list too, so only images references the pixels
+    # The models are independent and both release the GIL while the GPU works: run OCR alongside YOLO
+    ocr_future = _get_ocr_executor().submit(_run_paddleocr, images)
+    ai_tag_lists = _run_yolo(images)
+    ocr_texts = ocr_future.result()
+    del images  # release the decoded pixels before the database writes
+
+    from .models import Picture
+
+    for picture, ai_tag_names, ocr_text in zip(pictures, ai_tag_lists, ocr_texts):
+        with transaction.atomic():
+            picture.set_ai_tags(ai_tag_names)
+            Picture.objects.filter(pk=picture.pk).update(ocr_text=ocr_text)
+            picture.ocr_text = ocr_text
+        logger.info("Picture %s: ai_tags=%s, ocr_text length=%s", picture.pk, len(ai_tag_names), len(ocr_text))
+
+
+def _process_pictures_ai(picture_ids):
     """
-    Extract objects (YOLO → ai_tags) and text (PaddleOCR → ocr_text) for a picture.
-    Expects to run on GPU worker. Picture image is read from default_storage using
-    picture.seaweedfs_file_id.
+    Run the AI pipeline over pictures in inference batches of AI_BATCH_SIZE.
+    Pictures are fetched and decoded in a thread pool, and the next batch is loaded while the current one is inferred.
     """
     from .models import Picture
 
-    try:
-        picture = Picture.objects.get(pk=picture_id, deleted_at__isnull=True)
-    except Picture.DoesNotExist:
-        logger.warning("Picture %s not found or deleted, skipping AI processing", picture_id)
+    pictures = list(Picture.objects.filter(pk__in=picture_ids, deleted_at__isnull=True))
+    found = {picture.pk for picture in pictures}
+    for picture_id in picture_ids:
+        if picture_id not in found:
+            logger.warning("Picture %s not found or deleted, skipping AI processing", picture_id)
+    if not pictures:
         return
 
-    path = picture.seaweedfs_file_id
-    if not path:
-        logger.warning("Picture %s has no seaweedfs_file_id, skipping AI processing", picture_id)
+    if len(pictures) == 1:
+        _infer_and_store(pictures, [_load_picture_image(pictures[0])])
         return
 
-    try:
-        with default_storage.open(path, 'rb') as f:
-            image_bytes = f.read()
-    except Exception as e:
-        logger.warning("Could not open image for picture %s: %s", picture_id, e)
-        return
+    chunks = [pictures[i:i + AI_BATCH_SIZE] for i in range(0, len(pictures), AI_BATCH_SIZE)]
+    # Storage reads and JPEG decoding both release the GIL, so they overlap with inference
+    with ThreadPoolExecutor(max_workers=AI_BATCH_SIZE) as pool:
+        pending = [pool.submit(_load_picture_image, picture) for picture in chunks[0]]
+        for index, chunk in enumerate(chunks):
+            decoded = [future.result() for future in pending]
+            following = chunks[index + 1] if index + 1 < len(chunks) else []
+            pending = [pool.submit(_load_picture_image, picture) for picture in following]
+            _infer_and_store(chunk, decoded)
 
-    if not image_bytes:
-        return
 
-    ai_tag_names = _run_yolo(image_bytes)
-    ocr_text = _run_paddleocr(image_bytes)
+@app.task(bind=True, queue='gpu', acks_late=True)
+def process_picture_ai(self, picture_id):
+    """
+    Extract objects (YOLO → ai_tags) and text (PaddleOCR → ocr_text) for a picture.
+    Expects to run on GPU worker. Picture image is read from default_storage using
+    picture.seaweedfs_file_id. Prefer queue_picture_ai() when queueing several pictures.
+    """
+    _process_pictures_ai([picture_id])
+
+
+@app.task(bind=True, queue='gpu', acks_late=True)
+def process_picture_ai_batch(self, picture_ids):
+    """Like process_picture_ai, but for a batch of pictures sharing one YOLO and one PaddleOCR call."""
+    _process_pictures_ai(list(picture_ids))
+
 
-    if ai_tag_names is not None:
-        picture.set_ai_tags(ai_tag_names)
-    if ocr_text is not None:
-        picture.ocr_text = ocr_text
-        picture.save(update_fields=['ocr_text'])
-    logger.info("Picture %s: ai_tags=%s, ocr_text length=%s", picture_id, len(ai_tag_names or []), len(ocr_text or ''))
+def queue_picture_ai(picture_ids, batch_size=AI_TASK_PICTURES):
+    """Queue AI processing for many pictures as process_picture_ai_batch tasks of batch_size ids each."""
+    picture_ids = list(picture_ids)
+    for start in range(0, len(picture_ids), batch_size):
+        process_picture_ai_batch.apply_async(args=[picture_ids[start:start + batch_size]], queue='gpu')
 
 
 def _extract_exif_tags_and_metadata(image_bytes):
@@ -184,7 +528,7 @@ def _extract_exif_tags_and_metadata(image_bytes):
     return tag_names, exif_data, taken_at
 
 
-@app.task(bind=True, queue='cpu')
+@app.task(bind=True, queue='cpu', acks_late=True)
 def extract_picture_exif(self, picture_id):
     """
     Extract EXIF metadata from a picture and add as tags (camera, location/gps, etc.).
@@ -205,23 +549,41 @@ def extract_picture_exif(self, picture_id):
 
     try:
         with default_storage.open(path, 'rb') as f:
-            image_bytes = f.read()
+            # EXIF (APP1, at most 64 KiB) precedes the pixel data; parse a prefix first
+            image_bytes = f.read(EXIF_PREFIX_BYTES)
+            tag_names, exif_data, taken_at = _extract_exif_tags_and_metadata(image_bytes)
+            if not exif_data and len(image_bytes) == EXIF_PREFIX_BYTES:
+                # Nothing found (e.g. large APP segments before APP1): fall back to the whole file
+                image_bytes += f.read()
+                tag_names, exif_data, taken_at = _extract_exif_tags_and_metadata(image_bytes)
     except Exception as e:
         logger.warning("Could not open image for picture %s (EXIF): %s", picture_id, e)
         return
 
-    if not image_bytes:
-        return
-
-    tag_names, exif_data, taken_at = _extract_exif_tags_and_metadata(image_bytes)
-
+    changes = {}
     if exif_data:
-        picture.exif_data = {**(picture.exif_data or {}), **exif_data}
-        picture.save(update_fields=['exif_data'])
+        changes['exif_data'] = {**(picture.exif_data or {}), **exif_data}
     if taken_at is not None:
-        picture.taken_at = taken_at
-        picture.save(update_fields=['taken_at'])
-    if tag_names:
-        picture.set_exif_tags(tag_names)
+        changes['taken_at'] = taken_at
+    # One UPDATE for the metadata (Picture has no save() override or signals) and one commit for everything
+    with transaction.atomic():
+        if changes:
+            Picture.objects.filter(pk=picture.pk).update(**changes)
+            for field_name, value in changes.items():
+                setattr(picture, field_name, value)
+        if tag_names:
+            picture.set_exif_tags(tag_names)
 
     logger.info("Picture %s: exif_tags=%s", picture_id, len(tag_names))
+
+
+@app.task(queue='cpu', ignore_result=True)
+def recount_tag_usage():
+    """
+    Recompute Tag.usage_count from PictureTag / Gallery / Album links in one UPDATE.
+    Write paths keep the counter up to date incrementally; this repairs any drift. Scheduled nightly.
+    """
+    from .models import Tag
+
+    updated = Tag.recount_usage()
+    logger.info("Recounted usage for %s tags", updated)
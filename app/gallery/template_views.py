@@ -1,26 +1,50 @@
 """
 Template-based views for Gallery app with HTMX support
 """
+from concurrent.futures import ThreadPoolExecutor
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models import Q, Count
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.template.loader import render_to_string
 from .models import Gallery, Album, Picture, Tag
-from .forms import GalleryForm, AlbumForm, PictureUploadForm, PictureEditForm
-from .utils import generate_signed_url, upload_picture_file, extract_images_from_archive
+from .forms import GalleryForm, AlbumForm, PictureUploadForm, PictureEditForm, parse_tag_names
+from .utils import (
+    generate_signed_url, generate_signed_urls, get_image_dimensions, upload_picture_file,
+    extract_images_from_archive,
+)
 import logging
 
 try:
-    from .tasks import process_picture_ai, extract_picture_exif
+    from .tasks import process_picture_ai, extract_picture_exif, queue_picture_ai
 except ImportError:
     process_picture_ai = None
     extract_picture_exif = None
+    queue_picture_ai = None
 
 logger = logging.getLogger(__name__)
 
+# Parallel storage uploads per multi-file/archive upload request
+UPLOAD_WORKERS = 8
+
+
+def _attach_signed_urls(pictures):
+    """Set picture.signed_url on every picture, signing all file ids in one batch (None on failure)."""
+    pictures = list(pictures)
+    file_ids = dict.fromkeys(p.seaweedfs_file_id for p in pictures if p.seaweedfs_file_id)
+    try:
+        urls = {file_id: signed['url'] for file_id, signed in generate_signed_urls(file_ids).items()}
+    except Exception:
+        urls = {}
+    for picture in pictures:
+        picture.signed_url = urls.get(picture.seaweedfs_file_id)
+
+
 @login_required
 def gallery_list(request):
     """List all galleries for the user; when search is present, also return albums and pictures matching the query."""
@@ -37,8 +61,8 @@ def gallery_list(request):
         gallery_qs = gallery_qs.filter(
             Q(name__icontains=search)
             | Q(description__icontains=search)
-            | Q(tags__name__icontains=search)
-        ).distinct()
+            | Tag.name_contains(Gallery, search)
+        )
 
     gallery_type = request.GET.get('gallery_type')
     if gallery_type:
@@ -58,8 +82,8 @@ def gallery_list(request):
         search_albums = album_qs.filter(
             Q(name__icontains=search)
             | Q(description__icontains=search)
-            | Q(tags__name__icontains=search)
-        ).distinct().select_related('gallery').prefetch_related('tags').order_by('-created_at')
+            | Tag.name_contains(Album, search)
+        ).select_related('gallery').prefetch_related('tags').order_by('-created_at')
 
         if shared:
             picture_qs = Picture.objects.filter(album__gallery__shared_with=user, deleted_at__isnull=True)
@@ -69,17 +93,9 @@ def gallery_list(request):
             Q(title__icontains=search)
             | Q(description__icontains=search)
             | Q(ocr_text__icontains=search)
-            | Q(tags__name__icontains=search)
-        ).distinct().select_related('album', 'album__gallery').prefetch_related('tags').order_by('-uploaded_at')
-        for picture in search_pictures:
-            if picture.seaweedfs_file_id:
-                try:
-                    signed = generate_signed_url(picture.seaweedfs_file_id)
-                    picture.signed_url = signed['url']
-                except Exception:
-                    picture.signed_url = None
-            else:
-                picture.signed_url = None
+            | Tag.name_contains(Picture, search)
+        ).select_related('album', 'album__gallery').prefetch_related('tags').order_by('-uploaded_at')
+        _attach_signed_urls(search_pictures)
 
     context = {
         'galleries': galleries,
@@ -94,17 +110,17 @@ def gallery_list(request):
 def gallery_detail(request, pk):
     """View gallery details"""
     gallery = get_object_or_404(
-        Gallery.objects.filter(
+        Gallery.objects.select_related('owner').filter(
             Q(owner=request.user) | Q(shared_with=request.user),
             deleted_at__isnull=True
         ),
         pk=pk
     )
     
-    # Prefetch albums with pictures; annotate with count of non-deleted pictures
-    albums = gallery.albums.filter(deleted_at__isnull=True).annotate(
+    # The template only shows album cards: count pictures instead of prefetching them
+    albums = gallery.albums.filter(deleted_at__isnull=True).defer('exif_metadata').annotate(
         picture_count=Count('pictures', filter=Q(pictures__deleted_at__isnull=True), distinct=True)
-    ).prefetch_related('pictures', 'tags')
+    ).prefetch_related('tags')
     
     context = {
         'gallery': gallery,
@@ -126,7 +142,7 @@ def gallery_create(request):
             # Handle tags
             tags_str = request.POST.get('tags', '')
             if tags_str:
-                tag_names = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
+                tag_names = parse_tag_names(tags_str)
                 gallery.set_tags(tag_names)
             
             messages.success(request, f'Gallery "{gallery.name}" created successfully!')
@@ -257,9 +273,7 @@ def gallery_bulk_delete(request):
         deleted_at__isnull=True,
         pk__in=ids
     )
-    count = galleries.count()
-    for gallery in galleries:
-        gallery.soft_delete()
+    count = Gallery.bulk_soft_delete(galleries)
     if count == 1:
         messages.success(request, '1 gallery deleted.')
     else:
@@ -271,24 +285,19 @@ def gallery_bulk_delete(request):
 def album_detail(request, pk):
     """View album details"""
     album = get_object_or_404(
-        Album.objects.filter(
+        Album.objects.select_related('gallery').filter(
             Q(gallery__owner=request.user) | Q(gallery__shared_with=request.user),
             deleted_at__isnull=True
         ),
         pk=pk
     )
     
+    # Thumbnail grid: load only the columns the template and URL signing need
+    pictures = album.pictures.filter(deleted_at__isnull=True).only(
+        'id', 'album_id', 'title', 'seaweedfs_file_id', 'is_favorite', 'uploaded_at'
+    ).prefetch_related('tags')
     # Generate signed URLs for pictures (set on same objects passed to template)
-    pictures = album.pictures.filter(deleted_at__isnull=True).prefetch_related('tags')
-    for picture in pictures:
-        if picture.seaweedfs_file_id:
-            try:
-                signed = generate_signed_url(picture.seaweedfs_file_id)
-                picture.signed_url = signed['url']
-            except Exception:
-                picture.signed_url = None
-        else:
-            picture.signed_url = None
+    _attach_signed_urls(pictures)
     context = {
         'album': album,
         'pictures': pictures,
@@ -315,7 +324,7 @@ def album_create(request, gallery_id):
             # Handle tags
             tags_str = request.POST.get('tags', '')
             if tags_str:
-                tag_names = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
+                tag_names = parse_tag_names(tags_str)
                 album.set_tags(tag_names)
             
             messages.success(request, f'Album "{album.name}" created successfully!')
@@ -431,9 +440,7 @@ def album_bulk_delete(request, pk):
         messages.warning(request, 'No albums selected.')
         return redirect('gallery:gallery_detail', pk=pk)
     albums = gallery.albums.filter(deleted_at__isnull=True, pk__in=ids)
-    count = albums.count()
-    for album in albums:
-        album.soft_delete()
+    count = Album.bulk_soft_delete(albums)
     if count == 1:
         messages.success(request, '1 album deleted.')
     else:
@@ -441,16 +448,19 @@ def album_bulk_delete(request, pk):
     return redirect('gallery:gallery_detail', pk=pk)
 
 
-def _process_uploaded_image(uploaded_file, album, form_cleaned_data):
-    """Process a single uploaded image: get dimensions, upload to storage, create Picture, add tags."""
-    width, height = None, None
-    try:
-        from PIL import Image
-        img = Image.open(uploaded_file)
-        width, height = img.size
-        uploaded_file.seek(0)
-    except Exception:
-        pass
+def _prepare_picture(uploaded_file, album, form_cleaned_data):
+    """Process a single uploaded image: get dimensions and upload to storage. Returns an unsaved Picture."""
+    width, height = get_image_dimensions(uploaded_file) or (None, None)
+    if width is None:
+        # HEIC and other formats the header reader does not know; Image.open only parses the header
+        try:
+            from PIL import Image
+            img = Image.open(uploaded_file)
+            width, height = img.size
+        except Exception:
+            pass
+        finally:
+            uploaded_file.seek(0)
 
     file_id = upload_picture_file(
         uploaded_file,
@@ -461,7 +471,7 @@ def _process_uploaded_image(uploaded_file, album, form_cleaned_data):
     if title == 'Untitled' and getattr(uploaded_file, 'name', ''):
         title = uploaded_file.name
 
-    picture = Picture(
+    return Picture(
         album=album,
         title=title,
         description=form_cleaned_data.get('description', ''),
@@ -471,14 +481,51 @@ def _process_uploaded_image(uploaded_file, album, form_cleaned_data):
         width=width,
         height=height,
     )
-    picture.save()
 
-    tags_str = form_cleaned_data.get('tags', '')
-    if tags_str:
-        tag_names = [t.strip() for t in tags_str.split(',') if t.strip()]
-        for tag_name in tag_names:
-            picture.add_tag(tag_name)
-    return picture
+
+def _create_uploaded_pictures(uploaded_files, album, form_cleaned_data):
+    """
+    Upload files to storage in parallel, then insert all Pictures and their tags in bulk.
+    Returns (created pictures, [(file name, error)] for files that failed to upload or to be saved);
+    if the bulk insert fails, the stored files are deleted and every file is reported as failed.
+    """
+    def prepare(uploaded_file):
+        try:
+            return _prepare_picture(uploaded_file, album, form_cleaned_data), None
+        except Exception as e:
+            return None, (getattr(uploaded_file, 'name', '?'), str(e))
+        finally:
+            # Release the spooled archive entry (memory or temp file) as soon as it is stored
+            uploaded_file.close()
+
+    uploaded_files = list(uploaded_files)
+    # Storage writes are network-bound (SeaweedFS/S3), so they overlap well in threads
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as pool:
+        results = list(pool.map(prepare, uploaded_files))
+    stored = [
+        (getattr(uploaded_file, 'name', '?'), picture)
+        for uploaded_file, (picture, _) in zip(uploaded_files, results) if picture is not None
+    ]
+    failed = [error for _, error in results if error is not None]
+    pictures = [picture for _, picture in stored]
+    if pictures:
+        try:
+            with transaction.atomic():
+                Picture.objects.bulk_create(pictures, batch_size=500)
+                tags_str = form_cleaned_data.get('tags', '')
+                if tags_str:
+                    Tag.bulk_apply(pictures, parse_tag_names(tags_str))
+        except Exception as e:
+            # Nothing was inserted: remove the already stored files so they are not orphaned
+            logger.exception("Could not save %s uploaded picture(s) to album %s", len(pictures), album.id)
+            for name, picture in stored:
+                try:
+                    default_storage.delete(picture.seaweedfs_file_id)
+                except Exception:
+                    logger.warning("Could not delete orphaned upload %s", picture.seaweedfs_file_id)
+                failed.append((name, str(e)))
+            pictures = []
+    return pictures, failed
 
 
 @login_required
@@ -527,14 +574,7 @@ def picture_upload(request, album_id):
                 context = {'form': form, 'album': album}
                 return render(request, 'gallery/picture_upload.html', context)
 
-            created = []
-            failed = []
-            for uploaded_file in images_to_process:
-                try:
-                    picture = _process_uploaded_image(uploaded_file, album, form.cleaned_data)
-                    created.append(picture)
-                except Exception as e:
-                    failed.append((getattr(uploaded_file, 'name', '?'), str(e)))
+            created, failed = _create_uploaded_pictures(images_to_process, album, form.cleaned_data)
 
             if failed:
                 for name, err in failed:
@@ -542,12 +582,13 @@ def picture_upload(request, album_id):
             if created:
                 extract_with_ai = form.cleaned_data.get('extract_with_ai', False)
                 extract_with_exif = form.cleaned_data.get('extract_with_exif', False)
-                if extract_with_ai and process_picture_ai:
-                    for picture in created:
-                        process_picture_ai.apply_async(args=[picture.id], queue='gpu')
+                if extract_with_ai and queue_picture_ai:
+                    # Batched so the GPU worker runs YOLO/PaddleOCR over several pictures per call
+                    queue_picture_ai([picture.id for picture in created])
                 if extract_with_exif and extract_picture_exif:
+                    # One task per picture: each is acked late and retried or failed on its own
                     for picture in created:
-                        extract_picture_exif.apply_async(args=[picture.id], queue='cpu')
+                        extract_picture_exif.apply_async((picture.id,), queue='cpu')
                 msg = f'{len(created)} picture(s) uploaded successfully.'
                 if len(created) == 1:
                     msg = f'Picture "{created[0].title}" uploaded successfully!'
@@ -566,11 +607,12 @@ def picture_upload(request, album_id):
 @login_required
 def picture_detail(request, pk):
     """View picture details"""
+    # One prefetch feeds both the user and AI tag lists in the template
     picture = get_object_or_404(
-        Picture.objects.filter(
+        Picture.with_tag_sources(Picture.objects.select_related('album').filter(
             Q(album__gallery__owner=request.user) | Q(album__gallery__shared_with=request.user),
             deleted_at__isnull=True
-        ),
+        )),
         pk=pk
     )
     
@@ -696,9 +738,7 @@ def picture_bulk_delete(request, pk):
         pk__in=ids,
         deleted_at__isnull=True
     )
-    count = to_delete.count()
-    for picture in to_delete:
-        picture.soft_delete()
+    count = Picture.bulk_soft_delete(to_delete)
     if count == 1:
         messages.success(request, '1 picture deleted.')
     else:
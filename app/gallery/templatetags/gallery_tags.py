@@ -6,14 +6,16 @@ from django import template
 register = template.Library()
 
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+
 @register.filter
 def filesizeformat(value):
     """Format file size in human-readable format"""
     if value is None:
         return "Unknown"
     
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if value < 1024.0:
-            return f"{value:.1f} {unit}"
-        value /= 1024.0
-    return f"{value:.1f} TB"
+    # Each unit is 2**10 of the previous one, so the unit index is the bit length / 10 (no loop)
+    size = int(value)
+    index = min((size.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1) if size > 0 else 0
+    return f"{value / (1 << (index * 10)):.1f} {_SIZE_UNITS[index]}"
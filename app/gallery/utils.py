@@ -4,20 +4,104 @@ Utility functions for Gallery app, including signed URL generation for SeaweedFS
 import hmac
 import hashlib
 import base64
+import binascii
+import functools
 import io
+import shutil
+import struct
+import tempfile
 import time
 import uuid
 import zipfile
 import tarfile
-from urllib.parse import urlencode, quote
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.core.files.storage import default_storage
-from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadedfile import UploadedFile
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Signed URL expiry is rounded up to a multiple of this many seconds (capped at 1/60 of
+# expires_in), so a file signed repeatedly within one window gets the same URL: the
+# signature comes from the cache below and browsers can reuse the image they already have
+SIGNED_URL_EXPIRY_BUCKET = 60
+
+
+@functools.lru_cache(maxsize=8)
+def _secret_bytes(secret_key):
+    """UTF-8 bytes of secret_key, encoded once per key instead of once per signature."""
+    return secret_key.encode('utf-8')
+
+
+@functools.lru_cache(maxsize=8)
+def _hmac_sha256_template(secret_key):
+    """Keyed HMAC-SHA256 state for secret_key; copy() it per message to skip the key schedule."""
+    return hmac.new(_secret_bytes(secret_key), digestmod=hashlib.sha256)
+
+
+@functools.lru_cache(maxsize=8)
+def _blake2s_key(secret_key):
+    """32-byte BLAKE2s key derived from secret_key (BLAKE2s keys are limited to 32 bytes)."""
+    return hashlib.blake2s(_secret_bytes(secret_key)).digest()
+
+
+def _signature_digest(uri_path, expires_at, secret_key, algorithm):
+    """
+    Raw signature of uri_path + expires_at + secret_key for the given algorithm.
+    The three parts are fed to the hasher one by one, so the string to sign is never built.
+    """
+    if algorithm == 'md5':
+        # Use MD5 for nginx secure_link compatibility
+        h = hashlib.md5()
+    elif algorithm == 'blake2s':
+        # Natively keyed 128-bit BLAKE2s: one hash instead of HMAC's two
+        h = hashlib.blake2s(digest_size=16, key=_blake2s_key(secret_key))
+    else:
+        # Use HMAC-SHA256 for custom validation
+        h = _hmac_sha256_template(secret_key).copy()
+    h.update(uri_path.encode('utf-8'))
+    h.update(str(expires_at).encode('utf-8'))
+    h.update(_secret_bytes(secret_key))
+    return h.digest()
+
+
+@functools.lru_cache(maxsize=8192)
+def _quote_file_id(file_id):
+    """Percent-encoded file_id for the URL path; pages re-sign the same files, so results are cached."""
+    return quote(file_id)
+
+
+@functools.lru_cache(maxsize=4096)
+def _url_signature(uri_path, expires_at, secret_key, algorithm):
+    """URL-safe base64 signature (unpadded) of uri_path + expires_at + secret_key."""
+    signature = _signature_digest(uri_path, expires_at, secret_key, algorithm)
+    return base64.urlsafe_b64encode(signature).rstrip(b'=').decode('ascii')
+
+
+def _decode_signature(signature):
+    """Raw digest from a URL-safe base64 signature (str or bytes, padding optional); None if malformed."""
+    try:
+        if isinstance(signature, str):
+            signature = signature.encode('ascii')
+        signature = signature.rstrip(b'=')
+        return base64.b64decode(signature + b'=' * (-len(signature) % 4), altchars=b'-_', validate=True)
+    except (UnicodeEncodeError, binascii.Error):
+        return None
+
+
+def _signing_secret(secret_key):
+    """secret_key, or GALLERY_SIGNED_URL_SECRET / Django SECRET_KEY when it is None."""
+    if secret_key is None:
+        secret_key = getattr(settings, 'GALLERY_SIGNED_URL_SECRET', None)
+        if secret_key is None:
+            # Fallback to Django SECRET_KEY
+            secret_key = settings.SECRET_KEY
+    return secret_key
+
+
 def generate_signed_url(file_id, expires_in=3600, secret_key=None, algorithm='md5'):
     """
     Generate a signed URL for SeaweedFS file access.
@@ -29,61 +113,56 @@ def generate_signed_url(file_id, expires_in=3600, secret_key=None, algorithm='md
         file_id: SeaweedFS file ID
         expires_in: URL expiration time in seconds (default: 1 hour)
         secret_key: Secret key for signing (defaults to SECRET_KEY from settings)
-        algorithm: Hash algorithm ('md5' for nginx secure_link, 'sha256' for custom)
+        algorithm: Hash algorithm ('md5' for nginx secure_link; 'sha256' or 'blake2s' for custom)
     
     Returns:
         dict with 'url' and 'expires_at' keys
     """
-    if secret_key is None:
-        secret_key = getattr(settings, 'GALLERY_SIGNED_URL_SECRET', None)
-        if secret_key is None:
-            # Fallback to Django SECRET_KEY
-            secret_key = settings.SECRET_KEY
+    return generate_signed_urls([file_id], expires_in, secret_key, algorithm)[file_id]
+
+
+def generate_signed_urls(file_ids, expires_in=3600, secret_key=None, algorithm='md5'):
+    """
+    Generate signed URLs for many SeaweedFS files at once (same format as generate_signed_url).
+    
+    Settings and the expiry timestamp are resolved once and reused for every file.
     
+    Args:
+        file_ids: Iterable of SeaweedFS file IDs
+        expires_in, secret_key, algorithm: see generate_signed_url
+    
+    Returns:
+        dict mapping file_id -> dict with 'url', 'expires_at' and 'expires_in' keys
+    """
+    secret_key = _signing_secret(secret_key)
     if not secret_key:
         raise ImproperlyConfigured(
             "GALLERY_SIGNED_URL_SECRET or SECRET_KEY must be set for signed URLs"
         )
     
-    # Calculate expiration timestamp
+    # Calculate expiration timestamp, rounded up to the expiry bucket
     expires_at = int(time.time()) + expires_in
+    bucket = min(SIGNED_URL_EXPIRY_BUCKET, expires_in // 60)
+    if bucket > 1:
+        expires_at += -expires_at % bucket
     
-    # Get base URL and construct full URI path
     base_url = getattr(settings, 'GALLERY_MEDIA_BASE_URL', '/media')
-    uri_path = f"{base_url}/{quote(file_id)}"
-
-    # Create the string to sign
-    # For nginx secure_link_md5: "$uri$secure_link_expires$secure_link_secret"
-    # This means: /media/file_id + expires_at + secret_key
-    string_to_sign = f"{uri_path}{expires_at}{secret_key}"
-    # Generate signature based on algorithm
-    if algorithm == 'md5':
-        # Use MD5 for nginx secure_link compatibility
-        signature = hashlib.md5(string_to_sign.encode('utf-8')).digest()
-    else:
-        # Use HMAC-SHA256 for custom validation
-        signature = hmac.new(
-            secret_key.encode('utf-8'),
-            string_to_sign.encode('utf-8'),
-            hashlib.sha256
-        ).digest()
-    signature = base64.urlsafe_b64encode(signature).decode('utf-8').rstrip('=')
-    
-    # Build query parameters
-    params = {
-        'st': signature,      # signature
-        'e': expires_at       # expires
-    }
-    
-    # Construct the signed URL
-    signed_url = f"{uri_path}?{urlencode(params)}"
-    # logger.info(f"{string_to_sign=} {len(string_to_sign)=} {repr(string_to_sign)} | {signature=} {len(signature)=} {repr(signature)} | {uri_path=} | {expires_at=} | {signed_url=}")
-    
-    return {
-        'url': signed_url,
-        'expires_at': expires_at,
-        'expires_in': expires_in
-    }
+    # Same for every file: format the expiry parameter once. The unpadded URL-safe base64
+    # signature needs no escaping, so the query string is built without urlencode()
+    expires_param = f"&e={expires_at}"
+    signed = {}
+    for file_id in file_ids:
+        # Get base URL and construct full URI path
+        uri_path = f"{base_url}/{_quote_file_id(file_id)}"
+        # For nginx secure_link_md5: "$uri$secure_link_expires$secure_link_secret"
+        # This means: /media/file_id + expires_at + secret_key
+        signature = _url_signature(uri_path, expires_at, secret_key, algorithm)
+        signed[file_id] = {
+            'url': f"{uri_path}?st={signature}{expires_param}",
+            'expires_at': expires_at,
+            'expires_in': expires_in
+        }
+    return signed
 
 
 def verify_signed_url(file_id, signature, expires_at, secret_key=None, algorithm='md5', uri_path=None):
@@ -94,51 +173,64 @@ def verify_signed_url(file_id, signature, expires_at, secret_key=None, algorithm
     
     Args:
         file_id: SeaweedFS file ID
-        signature: Signature from URL (st parameter)
+        signature: Signature from URL (st parameter, str or bytes)
         expires_at: Expiration timestamp from URL (e parameter)
         secret_key: Secret key for verification
-        algorithm: Hash algorithm ('md5' or 'sha256')
-        uri_path: Full URI path (for MD5 verification)
+        algorithm: Hash algorithm ('md5', 'sha256' or 'blake2s')
+        uri_path: Full URI path (defaults to the media URL of file_id)
     
     Returns:
         bool: True if signature is valid and not expired
     """
-    if secret_key is None:
-        secret_key = getattr(settings, 'GALLERY_SIGNED_URL_SECRET', None)
-        if secret_key is None:
-            secret_key = settings.SECRET_KEY
+    # Check if expired (first: stale links are rejected without settings lookups or hashing)
+    if int(time.time()) > int(expires_at):
+        return False
     
-    if not secret_key:
+    provided_signature = _decode_signature(signature)
+    if provided_signature is None:
         return False
     
-    # Check if expired
-    if int(time.time()) > int(expires_at):
+    secret_key = _signing_secret(secret_key)
+    if not secret_key:
         return False
     
-    # Recreate the signature
-    if algorithm == 'md5':
-        if uri_path is None:
-            base_url = getattr(settings, 'GALLERY_MEDIA_BASE_URL', '/media')
-            uri_path = f"{base_url}/{quote(file_id)}"
-        string_to_sign = f"{uri_path}{expires_at}{secret_key}"
-        expected_signature = hashlib.md5(string_to_sign.encode('utf-8')).digest()
-        expected_signature_b64 = base64.urlsafe_b64encode(expected_signature).rstrip(b'=')
-        return hmac.compare_digest(expected_signature_b64, signature)
-    else:
-        # SHA256 verification
+    # Recreate the signature and compare raw digests (no re-encoding of the expected one)
+    if uri_path is None:
         base_url = getattr(settings, 'GALLERY_MEDIA_BASE_URL', '/media')
-        uri_path = uri_path or f"{base_url}/{quote(file_id)}"
-        string_to_sign = f"{uri_path}{expires_at}{secret_key}"
-        expected_signature = hmac.new(
-            secret_key.encode('utf-8'),
-            string_to_sign.encode('utf-8'),
-            hashlib.sha256
-        ).digest()
-        expected_signature_b64 = base64.urlsafe_b64encode(expected_signature).decode('utf-8').rstrip('=')
-        signature_padded = signature
-        if len(signature_padded) % 4:
-            signature_padded += '=' * (4 - len(signature_padded) % 4)
-        return hmac.compare_digest(expected_signature_b64, signature_padded)
+        uri_path = f"{base_url}/{_quote_file_id(file_id)}"
+    expected_signature = _signature_digest(uri_path, expires_at, secret_key, algorithm)
+    return hmac.compare_digest(expected_signature, provided_signature)
+
+
+def verify_signed_urls(items, secret_key=None, algorithm='md5'):
+    """
+    Verify many signed URLs at once (same checks as verify_signed_url).
+    
+    The clock, secret and media base URL are resolved once for the batch, and keyed hashers are
+    copied from one per-secret template, so stale or malformed entries cost no hashing at all.
+    
+    Args:
+        items: Iterable of (file_id, signature, expires_at) tuples
+        secret_key, algorithm: see verify_signed_url
+    
+    Returns:
+        list of bool, one per item in order
+    """
+    now = int(time.time())
+    secret_key = _signing_secret(secret_key)
+    base_url = getattr(settings, 'GALLERY_MEDIA_BASE_URL', '/media')
+    results = []
+    for file_id, signature, expires_at in items:
+        provided_signature = None
+        if secret_key and now <= int(expires_at):
+            provided_signature = _decode_signature(signature)
+        if provided_signature is None:
+            results.append(False)
+            continue
+        uri_path = f"{base_url}/{_quote_file_id(file_id)}"
+        expected_signature = _signature_digest(uri_path, expires_at, secret_key, algorithm)
+        results.append(hmac.compare_digest(expected_signature, provided_signature))
+    return results
 
 
 def upload_picture_file(file, album_id, content_type=None):
@@ -157,19 +249,103 @@ def upload_picture_file(file, album_id, content_type=None):
     ext = (file.name or '').split('.')[-1].lower() or 'jpg'
     if ext not in ('jpg', 'jpeg', 'png', 'gif', 'webp', 'heic', 'heif'):
         ext = 'jpg'
+    # uuid4 names are unique, so S3 storage skips its exists() check (AWS_S3_FILE_OVERWRITE)
     name = f'pictures/{album_id}/{uuid.uuid4().hex}.{ext}'
     path = default_storage.save(name, file)
     return path
 
 
+# JPEG start-of-frame markers (SOF0-SOF15 except DHT, JPG and DAC), which carry the frame size
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# JPEG markers without a length field (TEM, RST0-7, SOI, EOI)
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+def _jpeg_dimensions(fileobj):
+    """Walk JPEG marker segments (seeking past their payloads) up to the first SOF; (width, height) or None."""
+    fileobj.seek(2)
+    while True:
+        byte = fileobj.read(1)
+        while byte and byte != b'\xff':
+            byte = fileobj.read(1)
+        while byte == b'\xff':  # fill bytes
+            byte = fileobj.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        header = fileobj.read(2)
+        if len(header) < 2:
+            return None
+        (length,) = struct.unpack('>H', header)
+        if marker in _JPEG_SOF_MARKERS:
+            frame = fileobj.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>xHH', frame)
+            return width, height
+        if marker == 0xDA or length < 2:  # start of scan without a frame header
+            return None
+        fileobj.seek(length - 2, io.SEEK_CUR)
+
+
+def get_image_dimensions(fileobj):
+    """
+    Read (width, height) from the header of a JPEG, PNG, GIF or WebP file without decoding it.
+    Only the header bytes are read (JPEG seeks past metadata segments). Returns None for other
+    formats or malformed headers; the file is rewound either way.
+    """
+    try:
+        fileobj.seek(0)
+        head = fileobj.read(30)
+        if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP' and len(head) == 30:
+            chunk = head[12:16]
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b'VP8L':
+                b0, b1, b2, b3 = head[21:25]
+                return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+            if chunk == b'VP8X':
+                return 1 + int.from_bytes(head[24:27], 'little'), 1 + int.from_bytes(head[27:30], 'little')
+            return None
+        if head[:2] == b'\xff\xd8':
+            return _jpeg_dimensions(fileobj)
+        return None
+    except (OSError, struct.error, ValueError):
+        return None
+    finally:
+        fileobj.seek(0)
+
+
 IMAGE_EXTENSIONS = frozenset(('jpg', 'jpeg', 'png', 'gif', 'webp', 'heic', 'heif'))
+# Threads decompressing ZIP members in parallel per archive
+ARCHIVE_WORKERS = 4
 
 
 def _is_image_filename(name):
-    if not name or '/' in name or '\\' in name:
+    """True for a bare file name with an image extension (names with path separators are rejected)."""
+    # Extension first: most non-image entries are rejected without scanning for separators
+    _, dot, ext = (name or '').rpartition('.')
+    if not dot or ext.lower() not in IMAGE_EXTENSIONS:
         return False
-    ext = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
-    return ext in IMAGE_EXTENSIONS
+    return '/' not in name and '\\' not in name
+
+
+def _spooled_member(source, name, size):
+    """
+    Copy an archive member into an UploadedFile backed by a SpooledTemporaryFile: kept in memory up to
+    FILE_UPLOAD_MAX_MEMORY_SIZE (like Django's own uploads), spilled to a temporary file beyond that.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    shutil.copyfileobj(source, spooled)
+    spooled.seek(0)
+    return UploadedFile(file=spooled, name=name, content_type='application/octet-stream', size=size)
 
 
 def extract_images_from_archive(archive_file, max_size=100 * 1024 * 1024):
@@ -183,7 +359,8 @@ def extract_images_from_archive(archive_file, max_size=100 * 1024 * 1024):
         max_size: Max total uncompressed size to process (default 100MB)
 
     Yields:
-        tuple: (original_filename, file-like object with .read(), .name, .size)
+        tuple: (original_filename, UploadedFile with .read(), .name, .size); entries are streamed
+        into spooled temporary files, so large images do not stay in memory
     """
     name = (getattr(archive_file, 'name', '') or '').lower()
     archive_file.seek(0)
@@ -191,6 +368,7 @@ def extract_images_from_archive(archive_file, max_size=100 * 1024 * 1024):
 
     if name.endswith('.zip'):
         with zipfile.ZipFile(archive_file, 'r') as zf:
+            members = []
             for info in zf.infolist():
                 if info.is_dir():
                     continue
@@ -199,12 +377,17 @@ def extract_images_from_archive(archive_file, max_size=100 * 1024 * 1024):
                 total_size += info.file_size
                 if total_size > max_size:
                     raise ValueError(f'Archive exceeds maximum size ({max_size // (1024*1024)}MB)')
-                data = zf.read(info.filename)
-                yield (info.filename, SimpleUploadedFile(
-                    name=info.filename.rsplit('/')[-1],
-                    content=data,
-                    content_type='application/octet-stream',
-                ))
+                members.append(info)
+
+            def inflate(info):
+                with zf.open(info) as member:
+                    return _spooled_member(member, info.filename.rsplit('/')[-1], info.file_size)
+
+            # zlib releases the GIL while inflating, so members decompress in parallel; ZipFile
+            # serializes the reads of the shared archive file itself
+            with ThreadPoolExecutor(max_workers=ARCHIVE_WORKERS) as pool:
+                for info, upload in zip(members, pool.map(inflate, members)):
+                    yield (info.filename, upload)
     elif name.endswith('.tar') or name.endswith('.tar.gz') or name.endswith('.tgz'):
         mode = 'r:gz' if ('.gz' in name or name.endswith('.tgz')) else 'r'
         with tarfile.open(fileobj=archive_file, mode=mode) as tf:
@@ -219,11 +402,8 @@ def extract_images_from_archive(archive_file, max_size=100 * 1024 * 1024):
                 f = tf.extractfile(member)
                 if f is None:
                     continue
-                data = f.read()
-                yield (member.name, SimpleUploadedFile(
-                    name=member.name.rsplit('/')[-1],
-                    content=data,
-                    content_type='application/octet-stream',
-                ))
+                with f:
+                    upload = _spooled_member(f, member.name.rsplit('/')[-1], member.size)
+                yield (member.name, upload)
     else:
         raise ValueError('Unsupported archive format. Use .zip, .tar, or .tar.gz')
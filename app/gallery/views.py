@@ -6,16 +6,28 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from .models import Gallery, Album, Picture, GalleryShare, Tag
+from django.db.models import Exists, OuterRef, Q
+from .models import Gallery, Album, Picture, PictureTag, GalleryShare, Tag, TagResolver
 from .serializers import (
     GallerySerializer, GalleryDetailSerializer,
     AlbumSerializer, AlbumDetailSerializer,
-    PictureSerializer, TagSerializer
+    PictureSerializer, TagSerializer, get_prefetch_for
 )
 from .utils import generate_signed_url
 
 
+class TagResolverMixin:
+    """Share one TagResolver per request through the serializer context (see TagResolver)."""
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        resolver = getattr(self.request, '_tag_resolver', None)
+        if resolver is None:
+            resolver = self.request._tag_resolver = TagResolver()
+        context['tag_resolver'] = resolver
+        return context
+
+
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Tag operations (read-only, tags are managed through objects)
@@ -27,23 +39,27 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """Get tags used by the user's galleries/albums/pictures"""
         user = self.request.user
-        # Get tags from user's galleries, albums, and pictures
-        gallery_tags = Tag.objects.filter(galleries__owner=user).distinct()
-        album_tags = Tag.objects.filter(albums__gallery__owner=user).distinct()
-        picture_tags = Tag.objects.filter(pictures__album__gallery__owner=user).distinct()
+        # One EXISTS probe per link table: no join fan-out across the three relations, so no DISTINCT
+        gallery_links = Gallery.tags.through.objects.filter(tag_id=OuterRef('pk'), gallery__owner=user)
+        album_links = Album.tags.through.objects.filter(tag_id=OuterRef('pk'), album__gallery__owner=user)
+        picture_links = PictureTag.objects.filter(tag_id=OuterRef('pk'), picture__album__gallery__owner=user)
         
-        return (gallery_tags | album_tags | picture_tags).distinct().order_by('name')
+        return Tag.objects.filter(
+            Exists(gallery_links) | Exists(album_links) | Exists(picture_links)
+        ).order_by('name')
     
     @action(detail=False, methods=['get'])
     def popular(self, request):
         """Get most popular tags"""
         limit = int(request.query_params.get('limit', 20))
-        tags = Tag.objects.filter(usage_count__gt=0).order_by('-usage_count')[:limit]
+        tags = Tag.objects.filter(usage_count__gt=0).order_by('-usage_count').only(
+            'id', 'name', 'slug', 'usage_count'
+        )[:limit]
         serializer = self.get_serializer(tags, many=True)
         return Response(serializer.data)
 
 
-class GalleryViewSet(viewsets.ModelViewSet):
+class GalleryViewSet(TagResolverMixin, viewsets.ModelViewSet):
     """
     ViewSet for Gallery operations
     """
@@ -54,16 +70,18 @@ class GalleryViewSet(viewsets.ModelViewSet):
         """Get galleries accessible by the user"""
         user = self.request.user
         queryset = Gallery.objects.filter(
-            Q(owner=user) | Q(shared_with=user),
+            Q(owner=user) | GalleryShare.shared_with(user),
             deleted_at__isnull=True
-        ).distinct()
+        )
         
         # Filter by tags if provided
         tags = self.request.query_params.getlist('tags')
         if tags:
-            queryset = queryset.filter(tags__name__in=tags).distinct()
+            queryset = Tag.filter_tagged(queryset, tags)
         
-        return queryset
+        return Gallery.with_album_count(queryset).select_related('owner').prefetch_related(
+            *get_prefetch_for(self.get_serializer_class())
+        )
     
     def get_serializer_class(self):
         """Use detail serializer for retrieve action"""
@@ -96,25 +114,22 @@ class GalleryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        shared_users = []
         from django.contrib.auth import get_user_model
         User = get_user_model()
         
-        for email in emails:
-            try:
-                user = User.objects.get(email=email)
-                share, created = GalleryShare.objects.get_or_create(
-                    gallery=gallery,
-                    user=user,
-                    defaults={'can_edit': can_edit}
-                )
-                if not created:
-                    share.can_edit = can_edit
-                    share.save()
-                shared_users.append(user.email)
-            except User.DoesNotExist:
-                # Could send invitation email here
-                pass
+        # One lookup for all addresses (first account per email); unknown ones could get an invitation here
+        users_by_email = {}
+        for user in User.objects.filter(email__in=emails).only('id', 'email').order_by('pk'):
+            users_by_email.setdefault(user.email, user)
+        
+        # INSERT ... ON CONFLICT (gallery, user) DO UPDATE SET can_edit: existing shares keep shared_at
+        GalleryShare.objects.bulk_create(
+            [GalleryShare(gallery=gallery, user=user, can_edit=can_edit) for user in users_by_email.values()],
+            update_conflicts=True,
+            unique_fields=['gallery', 'user'],
+            update_fields=['can_edit'],
+        )
+        shared_users = [email for email in dict.fromkeys(emails) if email in users_by_email]
         
         return Response({
             'message': f'Gallery shared with {len(shared_users)} users',
@@ -152,7 +167,7 @@ class GalleryViewSet(viewsets.ModelViewSet):
         return Response({'is_favorite': gallery.is_favorite})
 
 
-class AlbumViewSet(viewsets.ModelViewSet):
+class AlbumViewSet(TagResolverMixin, viewsets.ModelViewSet):
     """
     ViewSet for Album operations
     """
@@ -165,10 +180,7 @@ class AlbumViewSet(viewsets.ModelViewSet):
         gallery_id = self.request.query_params.get('gallery_id')
         
         queryset = Album.objects.filter(
-            gallery__owner=user,
-            deleted_at__isnull=True
-        ) | Album.objects.filter(
-            gallery__shared_with=user,
+            Q(gallery__owner=user) | GalleryShare.shared_with(user, 'gallery_id'),
             deleted_at__isnull=True
         )
         
@@ -178,9 +190,11 @@ class AlbumViewSet(viewsets.ModelViewSet):
         # Filter by tags if provided
         tags = self.request.query_params.getlist('tags')
         if tags:
-            queryset = queryset.filter(tags__name__in=tags).distinct()
+            queryset = Tag.filter_tagged(queryset, tags)
         
-        return queryset.distinct()
+        return Album.with_picture_count(queryset).select_related('gallery').prefetch_related(
+            *get_prefetch_for(self.get_serializer_class())
+        )
     
     def get_serializer_class(self):
         """Use detail serializer for retrieve action"""
@@ -199,7 +213,7 @@ class AlbumViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class PictureViewSet(viewsets.ModelViewSet):
+class PictureViewSet(TagResolverMixin, viewsets.ModelViewSet):
     """
     ViewSet for Picture operations
     """
@@ -212,10 +226,7 @@ class PictureViewSet(viewsets.ModelViewSet):
         album_id = self.request.query_params.get('album_id')
         
         queryset = Picture.objects.filter(
-            album__gallery__owner=user,
-            deleted_at__isnull=True
-        ) | Picture.objects.filter(
-            album__gallery__shared_with=user,
+            Q(album__gallery__owner=user) | GalleryShare.shared_with(user, 'album__gallery_id'),
             deleted_at__isnull=True
         )
         
@@ -225,9 +236,11 @@ class PictureViewSet(viewsets.ModelViewSet):
         # Filter by tags if provided
         tags = self.request.query_params.getlist('tags')
         if tags:
-            queryset = queryset.filter(tags__name__in=tags).distinct()
+            queryset = Tag.filter_tagged(queryset, tags)
         
-        return queryset.distinct()
+        return queryset.select_related('album').prefetch_related(
+            *get_prefetch_for(self.get_serializer_class())
+        )
     
     @action(detail=True, methods=['get'])
     def signed_url(self, request, pk=None):
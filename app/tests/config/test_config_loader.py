@@ -0,0 +1,69 @@
+"""
+Tests for the YAML/env config loader.
+"""
+import os
+
+import pytest
+from config.config_loader import AppSettings, ConfigLoader
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / 'config.yaml'
+    path.write_text("django:\n  debug: true\n  site_id: 3\ndatabase:\n  name: gallery_test\n")
+    return path
+
+
+@pytest.mark.unit
+class TestConfigLoader:
+    """Test config lookups and caching."""
+
+    def test_get_nested_value(self, config_file):
+        """Test reading nested values and falling back to defaults."""
+        loader = ConfigLoader(config_file)
+        assert loader.get('database.name') == 'gallery_test'
+        assert loader.get_bool('django.debug') is True
+        assert loader.get_int('django.site_id') == 3
+        assert loader.get('database.missing', 'fallback') == 'fallback'
+        assert loader.get('database.missing', 'other') == 'other'
+
+    def test_env_var_overrides_yaml(self, config_file, monkeypatch):
+        """Test that environment variables take precedence over YAML."""
+        monkeypatch.setenv('DATABASE_NAME', 'from_env')
+        loader = ConfigLoader(config_file)
+        assert loader.get('database.name') == 'from_env'
+
+    def test_refresh_env(self, config_file, monkeypatch):
+        """Test that env vars set after init are only seen after refresh_env()."""
+        loader = ConfigLoader(config_file)
+        monkeypatch.setenv('DATABASE_NAME', 'late_env')
+        assert loader.get('database.name') == 'gallery_test'
+        loader.refresh_env()
+        assert loader.get('database.name') == 'late_env'
+
+    def test_reload_picks_up_changes(self, config_file):
+        """Test that reload() re-parses the file when its mtime changes."""
+        loader = ConfigLoader(config_file)
+        assert loader.get('database.name') == 'gallery_test'
+
+        config_file.write_text("database:\n  name: changed\n")
+        stat = config_file.stat()
+        os.utime(config_file, (stat.st_atime, stat.st_mtime + 10))
+        loader.reload()
+        assert loader.get('database.name') == 'changed'
+
+    def test_missing_file_uses_defaults(self, tmp_path):
+        """Test that a missing config file falls back to defaults."""
+        loader = ConfigLoader(tmp_path / 'missing.yaml')
+        assert loader.config == {}
+        assert loader.get('django.debug', False) is False
+
+    def test_app_settings_from_loader(self, config_file):
+        """Test that AppSettings resolves typed values and defaults in one pass."""
+        app_settings = AppSettings.from_loader(ConfigLoader(config_file))
+        assert app_settings.django_debug is True
+        assert app_settings.django_site_id == 3
+        assert app_settings.database_name == 'gallery_test'
+        assert app_settings.django_allowed_hosts == ['localhost', '127.0.0.1', '0.0.0.0']
+        with pytest.raises(AttributeError):
+            app_settings.django_debug = False
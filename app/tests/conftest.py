@@ -81,12 +81,14 @@ def authenticated_api_client(api_client, user):
 
 
 @pytest.fixture(autouse=True)
-def enable_db_access_for_all_tests(db):
+def enable_db_access_for_all_tests(request):
     """
-    Automatically enable database access for all tests.
-    This ensures all tests can access the database without needing @pytest.mark.django_db.
+    Automatically enable database access for all tests except those marked unit.
+    This ensures tests can access the database without needing @pytest.mark.django_db, while pure
+    unit tests skip the per-test transaction (and `pytest -m unit` never creates a test database).
     """
-    pass
+    if request.node.get_closest_marker('unit') is None:
+        request.getfixturevalue('db')
 
 
 @pytest.fixture
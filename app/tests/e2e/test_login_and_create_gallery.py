@@ -5,6 +5,8 @@ Run:
   pytest app/tests/e2e/test_login_and_create_gallery.py -m e2e -v
   playwright install chromium   # once, to install browser
 """
+import re
+
 import pytest
 from playwright.sync_api import Page, expect
 
@@ -30,8 +32,8 @@ def test_login_and_create_gallery(
     page.get_by_label("Password").fill(password)
     page.get_by_role("button", name="Sign in").click()
 
-    # After login we should land on gallery list (or redirect to next)
-    page.wait_for_url(f"{base_url}/**", wait_until="networkidle")
+    # After login we should land on gallery list (or redirect to next); expect() retries until
+    # the redirect happens, so there is no networkidle wait
     expect(page).not_to_have_url(f"{base_url}/accounts/login/")
 
     # --- Create gallery page ---
@@ -47,7 +49,7 @@ def test_login_and_create_gallery(
     page.get_by_role("button", name="Create Gallery").click()
 
     # --- Assert redirect to list and gallery visible ---
-    page.wait_for_url(f"{base_url}/**", wait_until="networkidle")
-    expect(page).to_have_url(f"{base_url}/galleries/1/")
+    # Any gallery id: the test must not depend on what the database held before
+    expect(page).to_have_url(re.compile(rf"^{re.escape(base_url)}/galleries/\d+/$"))
     expect(page.get_by_role("link", name="My Galleries")).to_be_visible()
     expect(page.get_by_role("heading", name=gallery_name)).to_be_visible()
@@ -63,25 +63,151 @@ class TestGalleryModel:
         gallery.add_tag("vacation")
         gallery.add_tag("beach")
         
-        # Refresh tags to get updated usage_count
-        tag1.refresh_from_db()
-        tag2.refresh_from_db()
-
-        tags = gallery.tags.all()
-        
-        assert gallery.tags.count() == 2
-        assert tag1 in tags
-        assert tag2 in tags
+        # One query each for links and counts instead of refreshing every tag
+        assert sorted(gallery.tags.values_list('name', flat=True)) == ["beach", "vacation"]
         # usage_count should be incremented when tags are added
-        assert tag1.usage_count == 1
-        assert tag2.usage_count == 1
+        assert dict(Tag.objects.values_list('name', 'usage_count')) == {"beach": 1, "vacation": 1}
         
         gallery.remove_tag("vacation")
-        tag1.refresh_from_db()
-        assert gallery.tags.count() == 1
-        assert tag1 not in gallery.tags.all()
+        assert list(gallery.tags.values_list('name', flat=True)) == ["beach"]
         # usage_count should be decremented when tag is removed
-        assert tag1.usage_count == 0
+        assert dict(Tag.objects.values_list('name', 'usage_count')) == {"beach": 1, "vacation": 0}
+
+    def test_remove_tag_matches_slug(self, user):
+        """Test that remove_tag finds a tag spelled with other casing/punctuation, and unknown tags raise."""
+        gallery = Gallery.objects.create(owner=user, name="Test Gallery")
+        gallery.add_tag("Beach Day")
+        gallery.remove_tag("beach-day")
+        assert not gallery.tags.exists()
+        assert Tag.objects.get(slug="beach-day").usage_count == 0
+        with pytest.raises(Tag.DoesNotExist):
+            gallery.remove_tag("never-used")
+
+    def test_gallery_set_tags(self, user):
+        """Test replacing all tags at once keeps usage counts in sync."""
+        gallery = Gallery.objects.create(owner=user, name="Test Gallery")
+        gallery.set_tags(["Vacation", "beach", "vacation"])
+        assert sorted(gallery.tags.values_list('name', flat=True)) == ["beach", "vacation"]
+
+        gallery.set_tags(["beach", "sunset"])
+        assert sorted(gallery.tags.values_list('name', flat=True)) == ["beach", "sunset"]
+        counts = dict(Tag.objects.values_list('name', 'usage_count'))
+        assert counts == {"beach": 1, "sunset": 1, "vacation": 0}
+
+
+    def test_bulk_apply_tags(self, user):
+        """Test tagging many galleries at once keeps existing links and counts usage per new link."""
+        first = Gallery.objects.create(owner=user, name="First")
+        second = Gallery.objects.create(owner=user, name="Second")
+        first.add_tag("beach")
+        Tag.bulk_apply([first, second], ["Beach", "sunset"])
+        assert sorted(first.tags.values_list('name', flat=True)) == ["beach", "sunset"]
+        assert sorted(second.tags.values_list('name', flat=True)) == ["beach", "sunset"]
+        counts = dict(Tag.objects.values_list('name', 'usage_count'))
+        assert counts == {"beach": 2, "sunset": 2}
+
+    def test_bulk_update_exif_metadata(self, user):
+        """Test merging EXIF metadata into several albums at once."""
+        gallery = Gallery.objects.create(owner=user, name="Test Gallery")
+        first = Album.objects.create(gallery=gallery, name="First", exif_metadata={"camera": "X"})
+        second = Album.objects.create(gallery=gallery, name="Second")
+        Album.bulk_update_exif_metadata({first.pk: {"lens": "50mm"}, second.pk: {"camera": "Y"}})
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.exif_metadata == {"camera": "X", "lens": "50mm"}
+        assert second.exif_metadata == {"camera": "Y"}
+
+    def test_soft_delete_cascade(self, user):
+        """Test that a cascading soft delete marks albums and pictures in bulk."""
+        gallery = Gallery.objects.create(owner=user, name="Test Gallery")
+        album = Album.objects.create(gallery=gallery, name="Album")
+        picture = Picture.objects.create(album=album, title="Picture")
+        gallery.soft_delete(cascade=True)
+        assert gallery.is_deleted
+        album.refresh_from_db()
+        picture.refresh_from_db()
+        assert album.deleted_at == gallery.deleted_at == picture.deleted_at
+        assert Gallery.bulk_soft_delete([gallery.pk]) == 0
+
+@pytest.mark.django_db
+class TestPictureModel:
+    """Test Picture model tag sources."""
+
+    @pytest.fixture
+    def picture(self, user):
+        gallery = Gallery.objects.create(owner=user, name="Test Gallery")
+        album = Album.objects.create(gallery=gallery, name="Test Album")
+        return Picture.objects.create(album=album, seaweedfs_file_id="pictures/1/test.jpg")
+
+    def test_set_ai_tags_replaces_only_ai_source(self, picture):
+        """Test that set_ai_tags leaves user tags alone and dedupes input."""
+        picture.set_tags(["dog"])
+        picture.set_ai_tags(["dog", "Cat", "cat ", " ", "!!!", None])
+        assert [t.name for t in picture.user_tags] == ["dog"]
+        assert sorted(t.name for t in picture.ai_tags) == ["cat", "dog"]
+
+        picture.set_ai_tags(["person"])
+        assert [t.name for t in picture.ai_tags] == ["person"]
+        counts = dict(Tag.objects.values_list('name', 'usage_count'))
+        assert counts == {"cat": 0, "dog": 1, "person": 1}
+
+    def test_with_tag_sources_prefetch(self, picture, django_assert_num_queries):
+        """Test that prefetched tag sources are read without extra queries."""
+        picture.set_tags(["beach"])
+        picture.set_ai_tags(["person", "beach"])
+        picture.set_exif_tags(["gps"])
+
+        prefetched = Picture.with_tag_sources().get(pk=picture.pk)
+        with django_assert_num_queries(0):
+            assert [t.name for t in prefetched.user_tags] == ["beach"]
+            assert [t.name for t in prefetched.ai_tags] == ["beach", "person"]
+            assert [t.name for t in prefetched.exif_tags] == ["gps"]
+            assert prefetched.all_tags == ["beach", "gps", "person"]
+        assert prefetched.all_tags == picture.all_tags
+
+
+    def test_bulk_add_tags(self, picture):
+        """Test that bulk_add_tags adds links per source and counts usage once per new link."""
+        picture.add_ai_tag("dog")
+        picture.bulk_add_tags([("Dog", "ai"), ("dog", "exif"), ("cat", "ai"), ("cat ", "ai"), ("", "ai")])
+        assert [t.name for t in picture.ai_tags] == ["cat", "dog"]
+        assert [t.name for t in picture.exif_tags] == ["dog"]
+        counts = dict(Tag.objects.values_list('name', 'usage_count'))
+        assert counts == {"cat": 1, "dog": 2}
+
+    def test_recount_usage(self, picture):
+        """Test that recount_usage rebuilds drifted counters from the link tables."""
+        picture.set_tags(["dog"])
+        picture.set_ai_tags(["dog"])
+        picture.album.gallery.set_tags(["dog", "cat"])
+        Tag.objects.update(usage_count=42)
+
+        assert Tag.recount_usage() == 2
+        counts = dict(Tag.objects.values_list('name', 'usage_count'))
+        assert counts == {"cat": 1, "dog": 3}
+
+    def test_search_by_tags(self, picture):
+        """Test that a picture matching several tags/sources is returned once."""
+        picture.set_tags(["dog", "cat"])
+        picture.set_ai_tags(["dog"])
+        assert list(Picture.search_by_tags(["dog", "cat"])) == [picture]
+        assert list(Picture.search_by_tags([" Dog "])) == [picture]
+        assert list(Picture.search_by_tags(["bird"])) == []
+        gallery = picture.album.gallery
+        gallery.set_tags(["dog", "cat"])
+        assert list(Gallery.search_by_tags(["dog", "cat"])) == [gallery]
+
+    def test_all_tags_by_pk(self, picture, django_assert_num_queries):
+        """Test that all_tags_by_pk merges sources for many pictures with at most one query."""
+        other = Picture.objects.create(album=picture.album, seaweedfs_file_id="pictures/1/other.jpg")
+        picture.set_tags(["dog"])
+        picture.set_ai_tags(["dog", "cat"])
+        with django_assert_num_queries(1):
+            assert Picture.all_tags_by_pk([picture, other]) == {picture.pk: ["cat", "dog"], other.pk: []}
+        prefetched = list(Picture.with_tag_sources().order_by('pk'))
+        with django_assert_num_queries(0):
+            merged = Picture.all_tags_by_pk(prefetched)
+        assert merged[picture.pk] == picture.all_tags
 
 
 @pytest.mark.django_db
@@ -112,18 +238,70 @@ class TestTagModel:
         # Initially 0 when tag is created but not used
         assert tag.usage_count == 0
         
+        # The UPDATE keeps the loaded counter in sync, so no re-read is needed between steps
         tag.increment_usage()
-        tag.refresh_from_db()
         assert tag.usage_count == 1
         
         tag.increment_usage()
-        tag.refresh_from_db()
         assert tag.usage_count == 2
         
         tag.decrement_usage()
-        tag.refresh_from_db()
         assert tag.usage_count == 1
         
         tag.decrement_usage()
-        tag.refresh_from_db()
         assert tag.usage_count == 0
+        
+        # Never below zero
+        tag.decrement_usage()
+        assert tag.usage_count == 0
+        assert Tag.objects.values_list("usage_count", flat=True).get(pk=tag.pk) == 0
+    
+    @pytest.mark.django_db(transaction=True)
+    def test_get_or_create_tag_uses_lookup_cache(self, django_assert_num_queries):
+        """Test that committed tags are served from the process-local cache and evicted on delete."""
+        from gallery import models as gallery_models
+        gallery_models._tag_cache.clear()
+        try:
+            tag, created = Tag.get_or_create_tag("Cached")
+            assert created
+            with django_assert_num_queries(0):
+                cached, created = Tag.get_or_create_tag(" cached ")
+            assert not created
+            assert (cached.pk, cached.name, cached.slug) == (tag.pk, "cached", "cached")
+
+            tag.delete()
+            _, created = Tag.get_or_create_tag("cached")
+            assert created
+        finally:
+            gallery_models._tag_cache.clear()
+    
+    def test_add_tag_skips_tag_deleted_elsewhere(self, user):
+        """Test that a cached id of a tag deleted by another process is evicted instead of linked."""
+        from gallery import models as gallery_models
+        gallery = Gallery.objects.create(owner=user, name="Test Gallery")
+        gallery_models._cache_tag("ghost", 987654, "ghost")
+        try:
+            gallery.add_tag("Ghost")
+            tag = Tag.objects.get(slug="ghost")
+            assert tag.pk != 987654
+            assert list(gallery.tags.all()) == [tag]
+            assert gallery_models._cached_tag("ghost") is None
+        finally:
+            gallery_models._tag_cache.clear()
+    
+    def test_tag_resolver_caches_ids(self, django_assert_num_queries):
+        """Test that TagResolver only hits the database for names it has not resolved yet."""
+        from gallery.models import TagResolver
+        resolver = TagResolver()
+        ids = resolver.tag_ids(["Sunset", "beach", "sunset"])
+        assert len(ids) == 2
+        with django_assert_num_queries(0):
+            assert resolver.tag_ids([" beach ", "SUNSET"]) == [ids[1], ids[0]]
+    
+    def test_name_contains(self, user):
+        """Test that name_contains matches tag substrings once per row, case-insensitively."""
+        gallery = Gallery.objects.create(owner=user, name="Tagged")
+        gallery.set_tags(["Beach", "beachball"])
+        Gallery.objects.create(owner=user, name="Untagged")
+        assert list(Gallery.objects.filter(Tag.name_contains(Gallery, " BEAC "))) == [gallery]
+        assert not Gallery.objects.filter(Tag.name_contains(Gallery, "forest")).exists()
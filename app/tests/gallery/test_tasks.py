@@ -0,0 +1,121 @@
+"""
+Tests for gallery Celery task helpers.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from gallery import tasks
+
+
+@pytest.mark.unit
+class TestWarmUpModels:
+    """Test that worker children only load the inference models for the 'gpu' queue."""
+    
+    @pytest.fixture
+    def loaded(self, monkeypatch):
+        """Replace the model loaders with stubs recording which ones ran."""
+        calls = []
+        monkeypatch.setattr(tasks, '_get_yolo', lambda: calls.append('yolo'))
+        monkeypatch.setattr(tasks, '_load_ocr_on_its_thread', lambda: calls.append('ocr'))
+        return calls
+    
+    def consume_from(self, monkeypatch, queues):
+        monkeypatch.setattr(tasks, 'app', SimpleNamespace(amqp=SimpleNamespace(queues=SimpleNamespace(
+            consume_from=queues,
+        ))))
+    
+    @pytest.mark.parametrize("queues", [{'gpu'}, {'cpu', 'gpu'}, None])
+    def test_loads_models_for_gpu_workers(self, monkeypatch, loaded, queues):
+        """Workers consuming 'gpu' (or every queue) warm up both models."""
+        self.consume_from(monkeypatch, queues)
+        tasks._warm_up_models()
+        assert loaded == ['yolo', 'ocr']
+    
+    def test_skips_cpu_only_workers(self, monkeypatch, loaded):
+        """Workers started with --queues=cpu load nothing."""
+        self.consume_from(monkeypatch, {'cpu'})
+        tasks._warm_up_models()
+        assert loaded == []
+    
+    def test_failed_loader_does_not_stop_the_other(self, monkeypatch, loaded):
+        """A model that fails to load is logged and the next one is still loaded."""
+        def broken():
+            raise RuntimeError("no GPU")
+        monkeypatch.setattr(tasks, '_get_yolo', broken)
+        self.consume_from(monkeypatch, {'gpu'})
+        tasks._warm_up_models()
+        assert loaded == ['ocr']
+
+
+@pytest.mark.unit
+class TestLoadYolo:
+    """Test that workers only load an already built TensorRT engine."""
+    
+    @pytest.fixture
+    def cache_dir(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(tasks, '_tensorrt_cache_dir', lambda: tmp_path)
+        return tmp_path
+    
+    class FakeYOLO:
+        """Records the weights each model is loaded from; export() must never be called."""
+        
+        def __init__(self, weights, task=None):
+            self.weights = weights
+        
+        def export(self, **kwargs):
+            raise AssertionError("workers must not export TensorRT engines")
+    
+    def test_missing_engine_uses_fp32(self, cache_dir):
+        """Without a built engine the FP32 weights are loaded and nothing is exported."""
+        model = tasks._load_yolo(self.FakeYOLO)
+        assert model.weights == 'yolov8n.pt'
+        assert not (cache_dir / 'yolov8n.engine').exists()
+    
+    def test_existing_engine_is_loaded(self, cache_dir):
+        """An engine built by build_yolo_engine is loaded as-is."""
+        (cache_dir / 'yolov8n.engine').write_bytes(b'engine')
+        model = tasks._load_yolo(self.FakeYOLO)
+        assert model.weights == str(cache_dir / 'yolov8n.engine')
+    
+    def test_build_command_requires_tensorrt(self, monkeypatch):
+        """build_yolo_engine fails clearly when TensorRT is disabled or unsupported."""
+        from django.core.management import CommandError, call_command
+        
+        monkeypatch.setattr(tasks, '_tensorrt_cache_dir', lambda: None)
+        with pytest.raises(CommandError, match="TensorRT is disabled"):
+            call_command('build_yolo_engine')
+
+
+@pytest.mark.unit
+class TestYoloChannelOrder:
+    """Test that both YOLO input paths hand ultralytics the same colours."""
+    
+    RED = (255, 0, 0)
+    
+    def red_image(self):
+        np = pytest.importorskip('numpy')
+        return np.full((32, 48, 3), self.RED, dtype=np.uint8)
+    
+    def test_array_fallback_is_bgr(self, monkeypatch):
+        """Without the pinned tensor, arrays are flipped to the BGR order ultralytics expects."""
+        sources = []
+        
+        class FakeModel:
+            def predict(self, source, **kwargs):
+                sources.append(source)
+                return []
+        
+        monkeypatch.setattr(tasks, '_get_yolo', FakeModel)
+        monkeypatch.setattr(tasks, '_yolo_input_tensor', lambda images: None)
+        tasks._run_yolo([self.red_image()])
+        assert tuple(sources[0][0][0, 0]) == self.RED[::-1]
+    
+    def test_tensor_path_is_rgb(self):
+        """The letterboxed tensor keeps RGB, which ultralytics uses unchanged."""
+        torch = pytest.importorskip('torch')
+        cv2 = pytest.importorskip('cv2')
+        host = torch.empty((1, tasks.YOLO_IMGSZ, tasks.YOLO_IMGSZ, 3), dtype=torch.uint8)
+        tasks._letterbox_into(host, [self.red_image()], cv2, torch)
+        center = tasks.YOLO_IMGSZ // 2
+        assert tuple(host[0, center, center].tolist()) == self.RED
@@ -4,7 +4,13 @@ Tests for gallery utility functions.
 import pytest
 from urllib.parse import urlparse, parse_qs, unquote
 from django.conf import settings
-from gallery.utils import generate_signed_url, verify_signed_url
+from gallery.utils import generate_signed_url, generate_signed_urls, verify_signed_url, verify_signed_urls
+
+
+def signed_params(result):
+    """(signature, expires_at) from the query string of a generate_signed_url result."""
+    query_params = parse_qs(urlparse(result["url"]).query)
+    return query_params["st"][0], int(query_params["e"][0])
 
 
 @pytest.mark.unit
@@ -30,21 +36,57 @@ class TestSignedURL:
         assert "e=" in signed_url
         assert "st=" in signed_url
     
+    @pytest.mark.parametrize("algorithm", ["md5", "sha256", "blake2s"])
+    def test_generate_signed_urls_matches_single(self, monkeypatch, algorithm):
+        """Test that batch signing produces the same URLs as signing one at a time."""
+        monkeypatch.setattr("gallery.utils.time.time", lambda: 1_700_000_000)
+        file_ids = ["01637037d6", "pictures/1/a b.jpg"]
+        batch = generate_signed_urls(file_ids, algorithm=algorithm)
+        assert list(batch) == file_ids
+        for file_id in file_ids:
+            assert batch[file_id] == generate_signed_url(file_id, algorithm=algorithm)
+    
+    def test_signed_url_stable_within_expiry_bucket(self, monkeypatch):
+        """Test that signing a file again a few seconds later yields the same URL."""
+        monkeypatch.setattr("gallery.utils.time.time", lambda: 1_700_000_001)
+        first = generate_signed_url("01637037d6")
+        monkeypatch.setattr("gallery.utils.time.time", lambda: 1_700_000_030)
+        second = generate_signed_url("01637037d6")
+        assert first == second
+        assert first["expires_at"] % 60 == 0
+        assert 1_700_000_030 + 3600 <= first["expires_at"] < 1_700_000_030 + 3600 + 60
+    
     def test_verify_signed_url(self):
         """Test verifying a signed URL."""
         file_id = "01637037d6"  # SeaweedFS file ID format (alphanumeric)
         result = generate_signed_url(file_id)
         
-        # Parse the URL to extract signature and expires_at
-        parsed_url = urlparse(result["url"])
-        query_params = parse_qs(parsed_url.query)
-        signature = query_params["st"][0].encode()
-        expires_at = int(query_params["e"][0])
+        signature, expires_at = signed_params(result)
         
-        # Verify the signed URL with all necessary arguments
-        assert verify_signed_url(file_id, signature, expires_at) is True
+        # Verify the signed URL with all necessary arguments (bytes signatures are accepted too)
+        assert verify_signed_url(file_id, signature.encode(), expires_at) is True
     
-    def test_expired_signed_url(self, settings_override):
+    @pytest.mark.parametrize("algorithm", ["sha256", "blake2s"])
+    def test_verify_signed_url_keyed(self, algorithm):
+        """Test verifying HMAC-SHA256 and keyed BLAKE2s signed URLs."""
+        file_id = "pictures/1/a b.jpg"
+        result = generate_signed_url(file_id, algorithm=algorithm)
+        signature, expires_at = signed_params(result)
+        assert verify_signed_url(file_id, signature, expires_at, algorithm=algorithm) is True
+        assert verify_signed_url(file_id, signature, expires_at + 1, algorithm=algorithm) is False
+        assert verify_signed_url(file_id, signature + "!", expires_at, algorithm=algorithm) is False
+    
+    @pytest.mark.parametrize("algorithm", ["md5", "sha256"])
+    def test_verify_signed_urls_batch(self, algorithm):
+        """Test that batch verification matches verifying one URL at a time."""
+        items = []
+        for file_id in ["01637037d6", "pictures/1/a b.jpg"]:
+            items.append((file_id, *signed_params(generate_signed_url(file_id, algorithm=algorithm))))
+        file_id, signature, expires_at = items[0]
+        items += [(file_id, signature, 1), (file_id, signature + "!", expires_at), (file_id, signature, expires_at + 60)]
+        assert verify_signed_urls(items, algorithm=algorithm) == [True, True, False, False, False]
+    
+    def test_expired_signed_url(self, settings_override, monkeypatch):
         """Test that expired URLs are rejected."""
         # Set a very short expiration time
         settings_override.GALLERY_SIGNED_URL_EXPIRES_IN = 1
@@ -52,17 +94,64 @@ class TestSignedURL:
         file_id = "01637037d6"  # SeaweedFS file ID format (alphanumeric)
         result = generate_signed_url(file_id, expires_in=1)
         
-        # Parse the URL to extract signature and expires_at
-        parsed_url = urlparse(result["url"])
-        query_params = parse_qs(parsed_url.query)
-        signature = query_params["st"][0]
-        expires_at = int(query_params["e"][0])
+        signature, expires_at = signed_params(result)
         
-        import time
-        time.sleep(2)  # Wait for expiration
+        # Still valid up to and including the expiry second
+        monkeypatch.setattr("gallery.utils.time.time", lambda: expires_at)
+        assert verify_signed_url(file_id, signature, expires_at) is True
         
-        # Verify that expired URL is rejected
+        # Move the clock past expiration instead of sleeping
+        monkeypatch.setattr("gallery.utils.time.time", lambda: expires_at + 1)
         assert verify_signed_url(file_id, signature, expires_at) is False
-        
-        # Note: This test might be flaky, but demonstrates the concept
-        # In practice, you'd mock time or use a test-specific expiration
+
+
+@pytest.mark.unit
+class TestImageDimensions:
+    """Test header-only image dimension reading."""
+    
+    @pytest.mark.parametrize("fmt,options", [
+        ("JPEG", {}),
+        ("JPEG", {"progressive": True, "exif": b"Exif\x00\x00" + b"\x00" * 4096}),
+        ("PNG", {}),
+        ("GIF", {}),
+        ("WEBP", {}),
+        ("WEBP", {"lossless": True}),
+    ])
+    def test_get_image_dimensions_matches_pillow(self, fmt, options):
+        """Test that header parsing agrees with Pillow and rewinds the file."""
+        import io
+        from PIL import Image
+        from gallery.utils import get_image_dimensions
+        buffer = io.BytesIO()
+        Image.new("RGB", (641, 479)).save(buffer, fmt, **options)
+        buffer.seek(7)
+        assert get_image_dimensions(buffer) == (641, 479)
+        assert buffer.tell() == 0
+    
+    def test_get_image_dimensions_unknown_format(self):
+        """Test that unsupported or truncated headers return None."""
+        import io
+        from gallery.utils import get_image_dimensions
+        assert get_image_dimensions(io.BytesIO(b"BM" + b"\x00" * 40)) is None
+        assert get_image_dimensions(io.BytesIO(b"\xff\xd8\xff\xe1\x00")) is None
+
+
+@pytest.mark.unit
+class TestArchiveFilenames:
+    """Test archive entry name filtering."""
+    
+    @pytest.mark.parametrize("name,expected", [
+        ("photo.jpg", True),
+        ("PHOTO.HEIC", True),
+        ("photo.txt", False),
+        ("jpg", False),
+        ("", False),
+        (None, False),
+        ("dir/photo.jpg", False),
+        ("dir\\photo.png", False),
+        ("dir.jpg/readme", False),
+    ])
+    def test_is_image_filename(self, name, expected):
+        """Test that only bare names with an image extension are accepted."""
+        from gallery.utils import _is_image_filename
+        assert _is_image_filename(name) is expected
@@ -36,6 +36,7 @@ class TestGalleryAPIViewSet:
     
     def test_create_gallery_api(self, authenticated_api_client, user):
         """Test creating a gallery via API."""
+        from gallery.models import Gallery
         url = reverse('gallery:gallery-list')
         data = {
             'name': 'Test Gallery',
@@ -45,4 +46,129 @@ class TestGalleryAPIViewSet:
         response = authenticated_api_client.post(url, data, format='json')
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data['name'] == 'Test Gallery'
-        assert response.data['owner'] == user.id
+        # Check what was stored rather than more serialized fields
+        gallery = Gallery.objects.only('owner_id', 'name', 'description', 'gallery_type').get(pk=response.data['id'])
+        assert (gallery.owner_id, gallery.name, gallery.description, gallery.gallery_type) == (
+            user.id, 'Test Gallery', 'Test description', 'private'
+        )
+
+    def test_list_galleries_album_count_api(self, authenticated_api_client, user):
+        """Test that album_count comes from the annotation and skips deleted albums."""
+        from gallery.models import Album, Gallery
+        gallery = Gallery.objects.create(owner=user, name="Counted")
+        Album.objects.create(gallery=gallery, name="Kept")
+        Album.objects.create(gallery=gallery, name="Gone").soft_delete()
+        url = reverse('gallery:gallery-list')
+        response = authenticated_api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]['album_count'] == 1
+
+    def test_share_gallery_api(self, authenticated_api_client, user, django_user_model):
+        """Test that sharing creates new shares, updates existing ones and skips unknown emails."""
+        from gallery.models import Gallery, GalleryShare
+        gallery = Gallery.objects.create(owner=user, name="Shared")
+        alice = django_user_model.objects.create_user(username='alice', email='alice@example.com', password='x')
+        bob = django_user_model.objects.create_user(username='bob', email='bob@example.com', password='x')
+        GalleryShare.objects.create(gallery=gallery, user=alice, can_edit=False)
+        url = reverse('gallery:gallery-share', args=[gallery.pk])
+        emails = ['bob@example.com', 'alice@example.com', 'nobody@example.com']
+        response = authenticated_api_client.post(url, {'emails': emails, 'can_edit': True}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['shared_with'] == ['bob@example.com', 'alice@example.com']
+        shares = dict(GalleryShare.objects.filter(gallery=gallery).values_list('user_id', 'can_edit'))
+        assert shares == {alice.pk: True, bob.pk: True}
+
+    def test_list_shared_galleries_api(self, authenticated_api_client, user, django_user_model):
+        """Test that owned and shared galleries are listed once each, and others are hidden."""
+        from gallery.models import Gallery, GalleryShare
+        other = django_user_model.objects.create_user(username='other', email='o@example.com', password='x')
+        third = django_user_model.objects.create_user(username='third', email='t@example.com', password='x')
+        mine = Gallery.objects.create(owner=user, name="Mine")
+        GalleryShare.objects.create(gallery=mine, user=other)
+        theirs = Gallery.objects.create(owner=other, name="Theirs")
+        GalleryShare.objects.create(gallery=theirs, user=user)
+        GalleryShare.objects.create(gallery=theirs, user=third)
+        Gallery.objects.create(owner=other, name="Private")
+        url = reverse('gallery:gallery-list')
+        response = authenticated_api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(g['name'] for g in response.data["results"]) == ["Mine", "Theirs"]
+
+
+@pytest.mark.django_db
+class TestTagAPIViewSet:
+    """Test Tag API ViewSet."""
+    
+    def test_list_tags_from_owned_objects(self, authenticated_api_client, user, django_user_model):
+        """Test that tags come from the user's galleries, albums and pictures, once each."""
+        from gallery.models import Album, Gallery, Picture
+        gallery = Gallery.objects.create(owner=user, name="Mine")
+        gallery.set_tags(['trip', 'shared'])
+        album = Album.objects.create(gallery=gallery, name="Day 1")
+        album.set_tags(['shared'])
+        Picture.objects.create(album=album, seaweedfs_file_id="a.jpg").set_tags(['beach', 'shared'])
+        other = django_user_model.objects.create_user(username='other', email='o@example.com', password='x')
+        Gallery.objects.create(owner=other, name="Theirs").set_tags(['private'])
+        url = reverse('gallery:tag-list')
+        response = authenticated_api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert [tag['name'] for tag in response.data["results"]] == ['beach', 'shared', 'trip']
+
+
+@pytest.mark.django_db
+class TestPictureUploadView:
+    """Test picture upload view."""
+    
+    def test_archive_upload_creates_tagged_pictures(self, authenticated_client, user, settings, tmp_path):
+        """Test that an archive upload inserts every picture and counts each tag once per picture."""
+        import io
+        import zipfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+        from gallery.models import Album, Gallery, Picture, Tag
+        settings.MEDIA_ROOT = str(tmp_path)
+        album = Album.objects.create(gallery=Gallery.objects.create(owner=user, name="Trip"), name="Day 1")
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            for i in range(3):
+                image = io.BytesIO()
+                Image.new('RGB', (40, 30)).save(image, 'JPEG')
+                zf.writestr(f"p{i}.jpg", image.getvalue())
+        url = reverse('gallery:picture_upload', args=[album.id])
+        response = authenticated_client.post(url, {
+            'archive': SimpleUploadedFile('pics.zip', archive.getvalue(), content_type='application/zip'),
+            'tags': 'beach, Sun',
+        })
+        assert response.status_code == 302
+        pictures = list(Picture.objects.filter(album=album))
+        assert [(p.width, p.height) for p in pictures] == [(40, 30)] * 3
+        assert sorted(t.name for t in pictures[0].user_tags) == ["beach", "sun"]
+        assert dict(Tag.objects.values_list('name', 'usage_count')) == {"beach": 3, "sun": 3}
+
+    def test_failed_insert_removes_stored_files(self, authenticated_client, user, settings, tmp_path, monkeypatch):
+        """Test that a failing bulk insert deletes the stored files and reports every file."""
+        import io
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.contrib.messages import get_messages
+        from django.db import DatabaseError
+        from PIL import Image
+        from gallery.models import Album, Gallery, Picture
+        settings.MEDIA_ROOT = str(tmp_path)
+        album = Album.objects.create(gallery=Gallery.objects.create(owner=user, name="Trip"), name="Day 1")
+        files = []
+        for i in range(2):
+            image = io.BytesIO()
+            Image.new('RGB', (40, 30)).save(image, 'JPEG')
+            files.append(SimpleUploadedFile(f"p{i}.jpg", image.getvalue(), content_type='image/jpeg'))
+
+        def fail(*args, **kwargs):
+            raise DatabaseError("insert failed")
+
+        monkeypatch.setattr(Picture.objects, 'bulk_create', fail)
+        url = reverse('gallery:picture_upload', args=[album.id])
+        response = authenticated_client.post(url, {'files': files})
+        assert response.status_code == 200
+        assert not Picture.objects.exists()
+        assert [p for p in tmp_path.rglob('*') if p.is_file()] == []
+        errors = [str(m) for m in get_messages(response.wsgi_request)]
+        assert errors == ['Failed to upload p0.jpg: insert failed', 'Failed to upload p1.jpg: insert failed']
@@ -5,6 +5,7 @@ This ensures models are available in the image and don't need to be downloaded a
 """
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 try:
@@ -32,21 +33,33 @@ try:
         # ('yolov8x.pt', 'YOLOv8x (extra large) - best accuracy'),
     ]
     
-    downloaded_models = []
-    
-    for model_name, description in models_to_download:
+    def download(model_name):
+        """Load (and so download) one model; returns (model_path, error)."""
         try:
-            print(f"\n[{len(downloaded_models) + 1}/{len(models_to_download)}] {description}")
-            print(f"Downloading {model_name}...")
             model = YOLO(model_name)
-            model_path = getattr(model, 'ckpt_path', model_name)
+            return getattr(model, 'ckpt_path', model_name), None
+        except Exception as e:
+            return None, e
+    
+    # Downloads are network-bound and independent, so fetch all models at once
+    print(f"\nDownloading {len(models_to_download)} model(s) in parallel...")
+    downloaded_models = []
+    with ThreadPoolExecutor(max_workers=len(models_to_download)) as pool:
+        futures = {
+            pool.submit(download, model_name): (model_name, description)
+            for model_name, description in models_to_download
+        }
+        for future in as_completed(futures):
+            model_name, description = futures[future]
+            model_path, error = future.result()
+            if error is not None:
+                # Continue with other models even if one fails
+                print(f"✗ Failed to download {model_name}: {error}")
+                continue
+            downloaded_models.append(model_name)
+            print(f"\n[{len(downloaded_models)}/{len(models_to_download)}] {description}")
             print(f"✓ {model_name} downloaded successfully")
             print(f"  Location: {model_path}")
-            downloaded_models.append(model_name)
-        except Exception as e:
-            print(f"✗ Failed to download {model_name}: {e}")
-            # Continue with other models even if one fails
-            continue
     
     print("\n" + "=" * 60)
     if downloaded_models:
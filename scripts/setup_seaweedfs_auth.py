@@ -45,8 +45,8 @@ def create_access_key(endpoint, identity="admin"):
     try:
         request = Request(url, method='POST')
         with urlopen(request, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            return data
+            # json.load reads the bytes body and detects its encoding; no separate decode() copy
+            return json.load(response)
     except HTTPError as e:
         print(f"Error: HTTP {e.code} - {e.reason}", file=sys.stderr)
         if e.code == 404: